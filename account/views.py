@@ -4,6 +4,8 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from account.serializers import RegisterSerializer, CustomTokenObtainPairSerializer, ProfileSerializer
+from common.authentication import TokenClaimsReadMixin
+from common.cache import invalidate_on_commit, TEAMS
 from common.constants import STH_WENT_WRONG_MSG, BAD_REQUEST
 from common.utils import generate_response
 
@@ -51,7 +53,7 @@ class LoginAPIView(TokenObtainPairView):
         )
 
 
-class ProfileAPIView(generics.GenericAPIView):
+class ProfileAPIView(TokenClaimsReadMixin, generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ProfileSerializer
 
@@ -69,6 +71,8 @@ class ProfileUpdateAPIView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         try:
             user = serializer.save(request=request)
+            # Team responses embed the owner's profile
+            invalidate_on_commit(TEAMS)
             serializer = self.serializer_class(user)
             data = {"user": serializer.data}
             return generate_response(
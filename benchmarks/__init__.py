@@ -0,0 +1,61 @@
+"""
+Benchmarks for the fantasy football API.
+
+Every module runs with `python -m benchmarks.<name>` from the project root. Benchmarks create a
+throwaway test database through Django's test database machinery, so they never touch db.sqlite3.
+"""
+import json
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fantasy_football.settings')
+    import django
+    django.setup()
+
+
+def create_test_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, durations, **extra):
+    """Throughput and latency percentiles (in milliseconds) for a list of per-operation durations in seconds."""
+    total = sum(durations)
+    return {
+        'name': name,
+        'operations': len(durations),
+        'throughput_per_sec': round(len(durations) / total, 2) if total else None,
+        'mean_ms': round(statistics.fmean(durations) * 1000, 3) if durations else None,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        **extra,
+    }
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def report(results, output=None):
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if output:
+        with open(output, 'w') as output_file:
+            output_file.write(text + '\n')
@@ -0,0 +1,157 @@
+"""
+Read throughput of the WSGI and ASGI deployments at equal worker counts and rising client concurrency.
+
+Seeds a throwaway SQLite database with `seed_league`, then serves it three ways with the same number of
+worker processes and sends anonymous market, team, player and history reads from up to `--concurrency`
+keep-alive clients:
+
+    wsgi         gunicorn, sync (or with --threads, gthread) workers, on the sync views under /api/
+    asgi-sync    uvicorn, the same sync views, each run in asgiref's thread executor
+    asgi-async   uvicorn, the native async views under /api/async/
+
+A sync worker serves one request per thread at a time, so its throughput flattens once the clients
+outnumber workers x threads; the async views keep the worker busy while queries run. The response
+cache is off (LEAGUE_CACHE_TIMEOUT=0) unless `--cache` is given, so every request reaches the database.
+Needs `pip install gunicorn uvicorn`, which the application itself does not depend on.
+
+    python -m benchmarks.asgi --workers 2 --concurrency 1 8 32 64 --output asgi.json
+"""
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks import setup_django, report
+from benchmarks.workloads import MARKET_QUERIES, HTTPTransport, Operation, run_workload
+
+CONFIGURATIONS = ['wsgi', 'asgi-sync', 'asgi-async']
+
+
+class ServerTransport(HTTPTransport):
+    """HTTPTransport against a server started elsewhere."""
+    name = 'server'
+
+    def __init__(self, port):
+        import threading
+
+        self.port = port
+        self._local = threading.local()
+
+    def close(self):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(configuration, port, args):
+    if configuration == 'wsgi':
+        command = ['gunicorn', 'fantasy_football.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--log-level', 'warning']
+        if args.threads > 1:
+            command += ['--worker-class', 'gthread', '--threads', str(args.threads)]
+        return command
+    return ['uvicorn', 'fantasy_football.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log']
+
+
+def wait_until_serving(server, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}: {server.stderr.read()[-2000:]}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not accept connections within {timeout}s")
+
+
+def read_operations(rng, requests_count, prefix):
+    from league.models import Team, Player, Transaction
+
+    team_ids = list(Team.objects.values_list('id', flat=True))
+    player_ids = list(Player.objects.values_list('id', flat=True))
+    has_history = Transaction.objects.exists()
+    paths = [
+        lambda: f'{prefix}players/for/purchase/?{urlencode(rng.choice(MARKET_QUERIES))}',
+        lambda: f'{prefix}team/',
+        lambda: f'{prefix}player/?page_size=20',
+        lambda: f'{prefix}team/{rng.choice(team_ids)}/',
+        lambda: f'{prefix}player/{rng.choice(player_ids)}/',
+    ]
+    if has_history:
+        paths.append(lambda: f'{prefix}transactions/history/')
+    return [Operation('GET', rng.choice(paths)()) for _ in range(requests_count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configurations', nargs='+', choices=CONFIGURATIONS, default=CONFIGURATIONS)
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes, the same for every server')
+    parser.add_argument('--threads', type=int, default=1, help='Threads per gunicorn worker')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Client threads, one run each')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per run')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=5000)
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache on')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    servers = {'wsgi': 'gunicorn', 'asgi-sync': 'uvicorn', 'asgi-async': 'uvicorn'}
+    missing = sorted({servers[name] for name in args.configurations if not shutil.which(servers[name])})
+    if missing:
+        parser.error(f"{' and '.join(missing)} not installed: pip install {' '.join(missing)}")
+
+    directory = tempfile.mkdtemp()
+    environment = {
+        **os.environ,
+        'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'asgi.sqlite3')}",
+        'ALLOWED_HOSTS': '127.0.0.1',
+        'DEBUG': 'false',
+        'REQUEST_INSTRUMENTATION': 'false',
+    }
+    if not args.cache:
+        environment['LEAGUE_CACHE_TIMEOUT'] = '0'
+    os.environ.update(environment)
+    manage = [sys.executable, 'manage.py']
+    subprocess.run([*manage, 'migrate', '--verbosity', '0'], env=environment, check=True)
+    subprocess.run([*manage, 'seed_league', '--users', str(args.users), '--players-per-team', '15',
+                    '--transactions', str(args.transactions), '--seed', str(args.seed)], env=environment, check=True)
+    setup_django()
+
+    results = []
+    try:
+        for configuration in args.configurations:
+            port = free_port()
+            server = subprocess.Popen(server_command(configuration, port, args), env=environment,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            try:
+                wait_until_serving(server, port)
+                prefix = '/api/async/' if configuration == 'asgi-async' else '/api/'
+                for concurrency in args.concurrency:
+                    operations = read_operations(random.Random(args.seed), args.requests, prefix)
+                    result = run_workload(ServerTransport(port), configuration, operations, concurrency)
+                    result['workers'] = args.workers
+                    results.append(result)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
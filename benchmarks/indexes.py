@@ -0,0 +1,152 @@
+"""
+EXPLAIN plans and timings of the league list queries with and without the league indexes.
+
+Seeds a throwaway database (1M players by default, 20 per team, 10% listed for sale), runs the exact
+querysets used by league/views.py, then drops the indexes declared in the models' Meta and runs them
+again. FK indexes are kept in both runs.
+
+    python -m benchmarks.indexes --players 1000000 --output indexes.json
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks import setup_django, create_test_database, report
+
+
+def seed(players_count, batch_size=10000):
+    from django.db import transaction
+    from django.utils import timezone
+
+    from account.models import User
+    from common.utils import explicit_timestamps
+    from league.models import Team, Player, Transaction
+
+    rng = random.Random(42)
+    teams_count = max(2, players_count // 20)
+    start = timezone.now() - timedelta(days=365)
+    positions = ['GK', 'DEF', 'MID', 'ATT']
+
+    with explicit_timestamps(Team, Player, Transaction), transaction.atomic():
+        for offset in range(0, teams_count, batch_size):
+            ids = range(offset, min(offset + batch_size, teams_count))
+            User.objects.bulk_create(
+                [User(email=f'user{index}@bench.local', first_name='Bench', password='!') for index in ids]
+            )
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        for offset in range(0, teams_count, batch_size):
+            Team.objects.bulk_create([
+                Team(user_id=user_ids[index], name=f'Team {index}', slogan='Bench',
+                     created_at=start + timedelta(seconds=index * 10), updated_at=start + timedelta(seconds=index * 10))
+                for index in range(offset, min(offset + batch_size, teams_count))
+            ])
+        team_ids = list(Team.objects.order_by('id').values_list('id', flat=True))
+
+        for offset in range(0, players_count, batch_size):
+            batch = []
+            for index in range(offset, min(offset + batch_size, players_count)):
+                created_at = start + timedelta(seconds=index * 30)
+                for_sale = rng.random() < 0.1
+                batch.append(Player(
+                    name=f'Player {index}', position=rng.choice(positions), team_id=team_ids[index % teams_count],
+                    for_sale=for_sale, sale_price=rng.randint(500, 2000) * 1000 if for_sale else None,
+                    created_at=created_at, updated_at=created_at + timedelta(seconds=rng.randint(0, 86400 * 30)),
+                ))
+            Player.objects.bulk_create(batch)
+
+        transactions_count = players_count // 10
+        for offset in range(0, transactions_count, batch_size):
+            batch = []
+            for index in range(offset, min(offset + batch_size, transactions_count)):
+                seller, buyer = rng.sample(team_ids, 2)
+                batch.append(Transaction(
+                    player_id=index + 1, seller_team_id=seller, buyer_team_id=buyer, transfer_amount=1000000,
+                    inactive=True, created_at=start + timedelta(seconds=index * 300),
+                ))
+            Transaction.objects.bulk_create(batch)
+    return team_ids
+
+
+def view_querysets(team_id):
+    from django.db.models import Q
+
+    from common.pagination import KeysetPagination
+    from league.models import Team, Player, Transaction
+
+    market = Player.objects.with_team().filter(for_sale=True).order_by('-updated_at', '-id')
+    middle = market.values('updated_at', 'id')[market.count() // 2]
+    ordering = ('-updated_at', '-id')
+    return {
+        'team_list': Team.objects.for_listing().order_by('-created_at', '-id')[:51],
+        'player_list': Player.objects.with_team().order_by('-created_at', '-id')[:51],
+        'market_first_page': market[:51],
+        'market_deep_page': market.filter(
+            KeysetPagination.seek_filter(ordering, [middle['updated_at'], middle['id']])
+        )[:51],
+        'transactions_history': Transaction.objects.with_teams().order_by('-created_at', '-id')[:51],
+        'my_transactions': Transaction.objects.with_teams().filter(
+            Q(buyer_team_id=team_id) | Q(seller_team_id=team_id)
+        ).order_by('-created_at', '-id')[:51],
+    }
+
+
+def measure(querysets, repeat):
+    results = {}
+    for name, queryset in querysets.items():
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            durations.append(time.perf_counter() - start)
+        results[name] = {
+            'median_ms': round(statistics.median(durations) * 1000, 3),
+            'plan': queryset.explain(),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    from django.db import connection
+
+    from league.models import Team, Player, Transaction
+
+    start = time.perf_counter()
+    team_ids = seed(args.players)
+    seed_seconds = time.perf_counter() - start
+    querysets = view_querysets(team_ids[len(team_ids) // 2])
+
+    with_indexes = measure(querysets, args.repeat)
+    models = [Team, Player, Transaction]
+    with connection.schema_editor() as editor:
+        for model in models:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+    without_indexes = measure(querysets, args.repeat)
+    with connection.schema_editor() as editor:
+        for model in models:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+
+    report({
+        'players': args.players,
+        'seed_seconds': round(seed_seconds, 1),
+        'queries': {
+            name: {'with_indexes': with_indexes[name], 'without_indexes': without_indexes[name]}
+            for name in querysets
+        },
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Latency of filtered and sorted transfer-market pages on a large market, with and without the market indexes.
+
+Seeds a throwaway database with 100k listed players by default (plus as many unlisted ones), then requests
+`players/for/purchase/` through the Django test client for a set of filter and sort combinations, with the
+response cache cleared before every request so each one reaches the database. The same requests are repeated
+after dropping the market indexes added for the filters. Reports p50/p95/p99 and the EXPLAIN plan per scenario.
+
+    python -m benchmarks.market --listings 100000 --requests 50 --output market.json
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks import setup_django, create_test_database, summarize, report
+
+SCENARIOS = {
+    'recent': {},
+    'position': {'position': 'MID'},
+    'price_range_by_price': {'min_price': 800000, 'max_price': 1200000, 'sort': 'price'},
+    'cheapest': {'sort': 'price'},
+    'most_valuable': {'sort': '-value'},
+    'position_by_price': {'position': 'DEF', 'sort': 'price'},
+    'position_value_range': {'position': 'ATT', 'min_value': 1500000, 'sort': '-value'},
+    'position_price_deep_page': {'position': 'GK', 'sort': 'price', 'min_price': 1500000},
+}
+MARKET_INDEXES = [
+    'player_for_sale_price_idx', 'player_for_sale_value_idx', 'player_position_updated_idx',
+    'player_position_price_idx', 'player_position_value_idx',
+]
+
+
+def seed(listings, batch_size=10000):
+    from django.db import transaction
+    from django.utils import timezone
+
+    from account.models import User
+    from common.utils import explicit_timestamps
+    from league.models import Team, Player
+
+    rng = random.Random(42)
+    players_count = listings * 2
+    teams_count = max(2, players_count // 20)
+    start = timezone.now() - timedelta(days=90)
+    positions = ['GK', 'DEF', 'DEF', 'MID', 'MID', 'ATT']
+
+    with explicit_timestamps(Team, Player), transaction.atomic():
+        User.objects.bulk_create(
+            [User(email=f'user{index}@bench.local', first_name='Bench', password='!') for index in range(teams_count)],
+            batch_size=batch_size,
+        )
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        Team.objects.bulk_create([
+            Team(user_id=user_id, name=f'Team {index}', slogan='Bench', created_at=start, updated_at=start)
+            for index, user_id in enumerate(user_ids)
+        ], batch_size=batch_size)
+        team_ids = list(Team.objects.order_by('id').values_list('id', flat=True))
+
+        for offset in range(0, players_count, batch_size):
+            batch = []
+            for index in range(offset, min(offset + batch_size, players_count)):
+                for_sale = index % 2 == 0
+                value = rng.randint(500, 3000) * 1000
+                updated_at = start + timedelta(seconds=rng.randint(0, 86400 * 90))
+                batch.append(Player(
+                    name=f'Player {index}', position=rng.choice(positions), team_id=team_ids[index % teams_count],
+                    value=value, for_sale=for_sale,
+                    sale_price=round(value * rng.uniform(0.8, 1.5), -3) if for_sale else None,
+                    created_at=start, updated_at=updated_at,
+                ))
+            Player.objects.bulk_create(batch)
+
+
+def run(client, requests_count):
+    from django.db import connection
+
+    from common.cache import get_cache
+    from league.models import Player
+    from league.serializers import MarketFilterSerializer
+
+    results = []
+    for name, params in SCENARIOS.items():
+        durations = []
+        client.get('/api/players/for/purchase/', params)  # Warm up
+        for _ in range(requests_count):
+            get_cache().clear()
+            start = time.perf_counter()
+            response = client.get('/api/players/for/purchase/', params)
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+
+        filters = MarketFilterSerializer(data=params)
+        filters.is_valid(raise_exception=True)
+        options = filters.validated_data
+        queryset = Player.objects.with_team().on_market(
+            positions=options.get('position'), min_price=options.get('min_price'),
+            max_price=options.get('max_price'), min_value=options.get('min_value'),
+            max_value=options.get('max_value'),
+        ).order_by(*MarketFilterSerializer.SORT_ORDERINGS[options['sort']])[:51]
+        results.append(summarize(name, durations, params=params, plan=queryset.explain(),
+                                 vendor=connection.vendor))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50, help='Requests per scenario')
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    from django.db import connection
+    from django.test import Client
+
+    from league.models import Player
+
+    start = time.perf_counter()
+    seed(args.listings)
+    seed_seconds = time.perf_counter() - start
+
+    client = Client()
+    with_indexes = run(client, args.requests)
+
+    indexes = [index for index in Player._meta.indexes if index.name in MARKET_INDEXES]
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(Player, index)
+    without_indexes = run(client, args.requests)
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.add_index(Player, index)
+
+    report({
+        'listings': args.listings,
+        'seed_seconds': round(seed_seconds, 1),
+        'with_market_indexes': with_indexes,
+        'without_market_indexes': without_indexes,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Registration throughput: the signup endpoint against the previous create-then-set_password path.
+
+    python -m benchmarks.registration --users 20 --output registration.json
+"""
+import argparse
+
+from benchmarks import setup_django, create_test_database, summarize, timed, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from account.models import User
+
+    client = APIClient()
+    url = reverse('user-registration')
+
+    def register(index):
+        response = client.post(url, {
+            'email': f'bench{index}@gmail.com',
+            'first_name': 'Bench',
+            'last_name': 'User',
+            'password': 'Asdf@1122',
+            'confirm_password': 'Asdf@1122',
+        }, format='json')
+        assert response.status_code == 201, response.content
+
+    def register_create_then_set_password(index):
+        # What RegisterSerializer.create used to do: INSERT with an unusable password, then hash and UPDATE
+        user = User.objects.create_user(email=f'legacy{index}@gmail.com', first_name='Bench', last_name='User')
+        user.set_password('Asdf@1122')
+        user.save()
+
+    current = [timed(register, index)[0] for index in range(args.users)]
+    legacy = [timed(register_create_then_set_password, index)[0] for index in range(args.users)]
+    report([
+        summarize('registration_endpoint', current),
+        summarize('legacy_create_then_set_password', legacy),
+    ], args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Rendering cost of a 10k-player listing envelope: DRF's JSONRenderer, FastJSONRenderer (orjson when
+installed, standard library otherwise) and FastJSONRenderer splicing pre-encoded `data` as a cache hit does.
+
+    python -m benchmarks.renderer --players 10000 --repeat 20
+"""
+import argparse
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import setup_django, summarize, timed, report
+
+
+def build_listing(players_count):
+    from django.utils import timezone
+
+    from account.models import User
+    from league.models import Team, Player
+    from league.serializers import PlayerSerializer
+
+    now = timezone.now()
+    teams = [
+        Team(id=index + 1, user=User(id=index + 1, email=f'user{index}@bench.local', first_name='Bench',
+                                     last_name='User'),
+             name=f'Team {index}', slogan='Bench', capital=Decimal('5000000.00'), total_value=Decimal('20000000.00'),
+             created_at=now, updated_at=now)
+        for index in range(max(1, players_count // 20))
+    ]
+    players = [
+        Player(id=index + 1, name=f'Player {index}', position='MID', value=Decimal('1000000.00'),
+               team=teams[index % len(teams)], for_sale=True, sale_price=Decimal('1250000.50'),
+               created_at=now - timedelta(minutes=index), updated_at=now)
+        for index in range(players_count)
+    ]
+    return PlayerSerializer(players, many=True).data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from common import renderers
+    from common.renderers import FastJSONRenderer, RawJSON, encode_json
+    from common.utils import generate_response
+
+    serialize_seconds, data = timed(build_listing, args.players)
+    envelope = generate_response(data=data, pagination={'next': None, 'previous': None}).data
+    spliced = generate_response(data=RawJSON(encode_json(data)), pagination={'next': None, 'previous': None}).data
+
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    results = [
+        summarize('drf_json_renderer', [timed(drf.render, envelope)[0] for _ in range(args.repeat)]),
+        summarize('fast_json_renderer', [timed(fast.render, envelope)[0] for _ in range(args.repeat)],
+                  encoder='orjson' if renderers.orjson else 'json'),
+        summarize('fast_json_renderer_spliced_data', [timed(fast.render, spliced)[0] for _ in range(args.repeat)]),
+    ]
+    report({
+        'players': args.players,
+        'serializer_seconds': round(serialize_seconds, 3),
+        'response_bytes': len(fast.render(envelope)),
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
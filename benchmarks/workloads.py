@@ -0,0 +1,315 @@
+"""
+Scripted API workloads with concurrent clients: market browsing, buy storms, history reads and registration bursts.
+
+Seeds a throwaway database with `manage.py seed_league`, then replays every selected workload from
+`--concurrency` client threads, either through the WSGI application in-process (one Django test client
+per thread) or over HTTP against a threaded local server wrapping the same WSGI application. Clients
+authenticate with JWTs issued for the seeded users. The JSON report holds the run metadata (git commit,
+arguments, database), then per workload the latency percentiles, the wall-clock throughput and the
+response status counts. With `--baseline`, every workload is also compared to an earlier report.
+
+    python -m benchmarks.workloads --users 2000 --concurrency 8 --output workloads.json
+    python -m benchmarks.workloads --transport http --baseline workloads.json --output workloads-http.json
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import queue
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import setup_django, create_test_database, summarize, report
+
+WORKLOADS = ['market_browse', 'buy_storm', 'history_reads', 'registration_burst']
+MARKET_QUERIES = [
+    {}, {'position': 'MID'}, {'sort': 'price'}, {'sort': '-value'}, {'position': 'DEF', 'sort': 'price'},
+    {'min_price': 800000, 'max_price': 1200000}, {'position': 'ATT', 'sort': '-price'},
+]
+
+
+class Operation:
+    __slots__ = ('method', 'path', 'body', 'token')
+
+    def __init__(self, method, path, body=None, token=None):
+        self.method, self.path, self.body, self.token = method, path, body, token
+
+
+class InProcessTransport:
+    """Calls the WSGI application directly through one Django test client per thread."""
+    name = 'in-process'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, operation):
+        from django.test import Client
+
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {operation.token}'} if operation.token else {}
+        if operation.method == 'GET':
+            response = client.get(operation.path, **headers)
+        else:
+            response = client.generic(operation.method, operation.path, json.dumps(operation.body or {}),
+                                      content_type='application/json', **headers)
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class HTTPTransport:
+    """Sends real HTTP requests, one keep-alive connection per client thread, to a local threaded server."""
+    name = 'http'
+
+    def __init__(self):
+        from django.conf import settings
+        from django.core.wsgi import get_wsgi_application
+
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, '127.0.0.1']
+        self.server = make_server('127.0.0.1', 0, get_wsgi_application(), ThreadingWSGIServer, QuietHandler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._local = threading.local()
+
+    def request(self, operation):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        headers = {'Content-Type': 'application/json'}
+        if operation.token:
+            headers['Authorization'] = f'Bearer {operation.token}'
+        body = None if operation.method == 'GET' else json.dumps(operation.body or {})
+        try:
+            connection.request(operation.method, operation.path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        # wsgiref answers with HTTP/1.0 and closes the socket, so reconnect when told to
+        if response.will_close:
+            connection.close()
+            self._local.connection = None
+        return response.status
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def access_tokens(users):
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    return {user.id: str(RefreshToken.for_user(user).access_token) for user in users}
+
+
+def market_browse(rng, requests_count, tokens):
+    from urllib.parse import urlencode
+
+    token_list = list(tokens.values())
+    operations = []
+    for _ in range(requests_count):
+        params = urlencode(rng.choice(MARKET_QUERIES))
+        operations.append(Operation('GET', f'/api/players/for/purchase/?{params}', token=rng.choice(token_list)))
+    return operations
+
+
+def buy_storm(rng, requests_count, tokens, contention=2):
+    """Lists players of a few seller teams and sends `contention` buyers after each one at once."""
+    from django.db.models import F
+
+    from league.models import Team, Player
+
+    teams = list(Team.objects.order_by('id').values_list('id', 'user_id'))
+    listings = max(1, requests_count // contention)
+    sellers = {team_id for team_id, _ in teams[:max(1, listings // 10)]}
+    player_ids = list(Player.objects.filter(team_id__in=sellers).order_by('id').values_list('id', flat=True)[:listings])
+    Player.objects.filter(id__in=player_ids).update(for_sale=True, sale_price=F('value'))
+    prices = dict(Player.objects.filter(id__in=player_ids).values_list('id', 'sale_price'))
+
+    buyers = [user_id for team_id, user_id in teams if team_id not in sellers]
+    operations = []
+    for player_id in player_ids:
+        for user_id in rng.sample(buyers, min(contention, len(buyers))):
+            operations.append(Operation('POST', f'/api/player/{player_id}/buy/',
+                                        {'price': str(prices[player_id])}, tokens[user_id]))
+    rng.shuffle(operations)
+    return operations[:requests_count]
+
+
+def history_reads(rng, requests_count, tokens):
+    token_list = list(tokens.values())
+    paths = ['/api/transactions/history/', '/api/my/transactions/']
+    return [Operation('GET', rng.choice(paths), token=rng.choice(token_list)) for _ in range(requests_count)]
+
+
+def registration_burst(rng, requests_count, tokens):
+    run_id = rng.getrandbits(32)
+    return [
+        Operation('POST', '/api/user/register/', {
+            'email': f'burst{run_id}.{index}@bench.local', 'first_name': 'Burst', 'last_name': 'User',
+            'password': 'Asdf@1122', 'confirm_password': 'Asdf@1122',
+        })
+        for index in range(requests_count)
+    ]
+
+
+def run_workload(transport, name, operations, concurrency):
+    from django.db import connections
+
+    pending = queue.SimpleQueue()
+    for operation in operations:
+        pending.put(operation)
+    durations, statuses, lock = [], Counter(), threading.Lock()
+
+    def client():
+        try:
+            while True:
+                try:
+                    operation = pending.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                try:
+                    status = transport.request(operation)
+                except Exception as err:
+                    status = type(err).__name__
+                elapsed = time.perf_counter() - start
+                with lock:
+                    durations.append(elapsed)
+                    statuses[str(status)] += 1
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start
+
+    return summarize(
+        name, durations, concurrency=concurrency, wall_seconds=round(wall_seconds, 3),
+        wall_throughput_per_sec=round(len(durations) / wall_seconds, 2) if wall_seconds else None,
+        statuses=dict(sorted(statuses.items())),
+    )
+
+
+def compare(results, baseline_path):
+    """Relative change, in percent, of the headline numbers against the same workloads of an earlier report."""
+    with open(baseline_path) as baseline_file:
+        baseline = {workload['name']: workload for workload in json.load(baseline_file)['workloads']}
+    comparison = {}
+    for workload in results:
+        previous = baseline.get(workload['name'])
+        if not previous:
+            continue
+        comparison[workload['name']] = {
+            metric: round((workload[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ('wall_throughput_per_sec', 'p50_ms', 'p95_ms', 'p99_ms')
+            if workload.get(metric) is not None and previous.get(metric)
+        }
+    return comparison
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000, help='Seeded users, each with a team')
+    parser.add_argument('--players-per-team', type=int, default=15, help='Leaves squad room for the buy storm')
+    parser.add_argument('--transactions', type=int, default=20000, help='Seeded historical transactions')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per workload')
+    parser.add_argument('--registrations', type=int, default=50, help='Requests of the registration burst')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads')
+    parser.add_argument('--transport', choices=['in-process', 'http'], default='in-process')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        # A file instead of the shared in-memory test database, so concurrent writers wait on locks
+        # (busy timeout) instead of failing with "database table is locked"
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'workloads.sqlite3')
+    create_test_database()
+
+    from django.core.management import call_command
+
+    from account.models import User
+
+    start = time.perf_counter()
+    call_command('seed_league', users=args.users, players_per_team=args.players_per_team,
+                 transactions=args.transactions, stdout=io.StringIO())
+    seed_seconds = time.perf_counter() - start
+    tokens = access_tokens(User.objects.all())
+
+    rng = random.Random(args.seed)
+    builders = {
+        'market_browse': lambda: market_browse(rng, args.requests, tokens),
+        'buy_storm': lambda: buy_storm(rng, args.requests, tokens),
+        'history_reads': lambda: history_reads(rng, args.requests, tokens),
+        'registration_burst': lambda: registration_burst(rng, args.registrations, tokens),
+    }
+
+    transport = HTTPTransport() if args.transport == 'http' else InProcessTransport()
+    try:
+        results = [
+            run_workload(transport, name, builders[name](), args.concurrency)
+            for name in args.workloads
+        ]
+    finally:
+        transport.close()
+
+    output = {
+        'metadata': {
+            'git_commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'arguments': vars(args),
+            'transport': transport.name,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'seed_seconds': round(seed_seconds, 1),
+        },
+        'workloads': results,
+    }
+    if args.baseline:
+        output['baseline_comparison'] = compare(results, args.baseline)
+    report(output, args.output)
+
+
+if __name__ == '__main__':
+    main()
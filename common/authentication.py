@@ -0,0 +1,157 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULT_USER_CACHE = {
+    'TTL': 60,
+    'MAX_SIZE': 10000,
+    'CLAIMS_USER_FOR_READS': False,
+}
+
+
+def user_cache_settings():
+    return {**DEFAULT_USER_CACHE, **getattr(settings, 'USER_CACHE', {})}
+
+
+class UserCache:
+    """
+    Thread-safe in-process LRU of user rows with a time to live.
+
+    Only plain field values are stored; every hit builds a fresh User instance, so related objects
+    cached on one request's user (e.g. `user.team`) never leak into another request.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        user_model = get_user_model()
+        field_names = [field.attname for field in user_model._meta.concrete_fields]
+        return user_model.from_db(None, field_names, [values[name] for name in field_names])
+
+    def set(self, key, user):
+        values = {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_, values) in self._entries.items() if values['id'] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                config = user_cache_settings()
+                _user_cache = UserCache(max_size=config['MAX_SIZE'], ttl=config['TTL'])
+    return _user_cache
+
+
+def invalidate_cached_user(user_id):
+    get_user_cache().invalidate_user(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user id of a verified token through the in-process user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+
+        cache = get_user_cache()
+        key = ('jwt', user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user)
+            return user
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that skips the password hasher for credentials verified within the cache TTL.
+
+    Credentials are keyed by an HMAC under SECRET_KEY, so the cache never holds the raw password.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        digest = hmac.new(
+            settings.SECRET_KEY.encode(), f'{userid}\0{password}'.encode(), hashlib.sha256
+        ).hexdigest()
+        cache = get_user_cache()
+        key = ('basic', digest)
+        user = cache.get(key)
+        if user is not None and user.is_active:
+            return user, None
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(key, user)
+        return user, auth
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Builds a lightweight user from the token claims (user_id, email, first_name, last_name) without
+    a database query. Names reflect the token as issued, so use it for read-only endpoints only.
+    """
+
+
+class TokenClaimsReadMixin:
+    """
+    Authenticates safe-method requests with `ClaimsJWTAuthentication` when
+    USER_CACHE['CLAIMS_USER_FOR_READS'] is enabled, falling back to the default authenticators.
+    """
+
+    def get_authenticators(self):
+        authenticators = super().get_authenticators()
+        if self.request.method in SAFE_METHODS and user_cache_settings()['CLAIMS_USER_FOR_READS']:
+            return [ClaimsJWTAuthentication()] + authenticators
+        return authenticators
@@ -0,0 +1,247 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.renderers import RawJSON, encode_json
+
+# Version scopes, one per kind of data embedded in league responses
+TEAMS = 'teams'
+PLAYERS = 'players'
+TRANSACTIONS = 'transactions'
+
+
+def get_cache():
+    return caches[getattr(settings, 'LEAGUE_CACHE_ALIAS', 'default')]
+
+
+def version_key(scope):
+    return f'league:version:{scope}'
+
+
+def get_versions(scopes):
+    """
+    Current version of every scope. A missing version (never set or evicted) starts from the clock
+    instead of 1, so it can never match a response cached under an earlier version.
+    """
+    cache = get_cache()
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    """get_versions() for async views."""
+    cache = get_cache()
+    keys = [version_key(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bumped_key(scope):
+    return f'league:bumped:{scope}'
+
+
+def bump_versions(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), time.time_ns(), timeout=None)
+    if getattr(settings, 'DATABASE_REPLICAS', {}).get('ALIASES'):
+        cache.set_many({bumped_key(scope): time.time() for scope in scopes}, timeout=3600)
+
+
+def may_be_stale(scopes):
+    """
+    Whether the current request read from a replica within the replication lag (PIN_SECONDS) of a write
+    to one of the scopes. Such a body may predate the write while the versions already include it, so it
+    must not be cached or tagged under them.
+    """
+    from common.db_router import get_replica_settings, read_from_replica
+
+    if not read_from_replica():
+        return False
+    lag = get_replica_settings()['PIN_SECONDS']
+    bumped = get_cache().get_many([bumped_key(scope) for scope in scopes])
+    return any(time.time() - bumped_at < lag for bumped_at in bumped.values())
+
+
+async def amay_be_stale(scopes):
+    from common.db_router import get_replica_settings, read_from_replica
+
+    if not read_from_replica():
+        return False
+    lag = get_replica_settings()['PIN_SECONDS']
+    bumped = await get_cache().aget_many([bumped_key(scope) for scope in scopes])
+    return any(time.time() - bumped_at < lag for bumped_at in bumped.values())
+
+
+def invalidate_on_commit(*scopes):
+    """Bump the scopes once the current transaction commits, so readers never cache uncommitted data."""
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def depends_on_user(request, user_params):
+    return any(param in request.query_params for param in user_params)
+
+
+def response_cache_key(request, scopes, versions, view_kwargs, per_user=False):
+    parts = [
+        request.get_host(),
+        request.resolver_match.view_name if request.resolver_match else request.path,
+        repr(sorted(view_kwargs.items())),
+        repr(sorted(request.query_params.lists())),
+        repr(list(zip(scopes, versions))),
+    ]
+    if per_user:
+        parts.append(str(request.user.pk))
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return f'league:response:{digest}'
+
+
+def cached_response(*scopes, timeout=None, user_params=()):
+    """
+    Read-through cache for GET handlers whose body does not depend on the requesting user.
+
+    The key includes the current version of every scope the response embeds, so bumping a scope
+    (see `invalidate_on_commit`) makes all responses built from older data unreachable.
+    Only 200 responses are stored, with `data` kept as encoded JSON that is spliced into hits unchanged.
+    Query parameters listed in `user_params` make the body user specific (e.g. `exclude_my_team`), and
+    requests using them are cached per user.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_cache()
+            # Versions are read before the database so a concurrent write can only make the entry unreachable
+            key = response_cache_key(
+                request, scopes, get_versions(scopes), kwargs, depends_on_user(request, user_params)
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return Response(data=cached, status=status.HTTP_200_OK)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and not may_be_stale(scopes):
+                envelope = dict(response.data)
+                if 'data' in envelope:
+                    envelope['data'] = RawJSON(encode_json(envelope['data']))
+                cache.set(
+                    key, envelope,
+                    timeout if timeout is not None else getattr(settings, 'LEAGUE_CACHE_TIMEOUT', 300)
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def response_etag(request, scopes, versions, per_user=False):
+    parts = [request.get_full_path(), repr(list(zip(scopes, versions)))]
+    if per_user:
+        parts.append(str(request.user.pk))
+    return quote_etag(hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32])
+
+
+def conditional_response(*scopes, per_user=False, user_params=()):
+    """
+    Strong ETags for GET handlers, derived from the scope versions instead of the response body.
+
+    A matching If-None-Match is answered with an empty 304 before the handler runs, so an unchanged
+    resource costs a couple of cache lookups and no queries or serialization. `If-None-Match: *` only
+    gets its 304 once the handler returned a 200, since the resource may not exist. `per_user` adds
+    the requesting user to the tag for handlers whose body depends on who asks (e.g. my-team), and
+    `user_params` does the same only for requests that use one of those query parameters.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            user_specific = per_user or depends_on_user(request, user_params)
+            etag = response_etag(request, scopes, get_versions(scopes), user_specific)
+            if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if etag in if_none_match:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK or may_be_stale(scopes):
+                    return response
+                if '*' in if_none_match:
+                    # Matches any current representation, so only once the handler found one
+                    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+            response['ETag'] = etag
+            if user_specific:
+                patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
+
+
+def async_cached_response(*scopes, timeout=None, user_params=()):
+    """
+    `cached_response` for async function views returning Django responses. The rendered body is
+    stored as-is and served without decoding.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            cache = get_cache()
+            key = response_cache_key(
+                request, scopes, await aget_versions(scopes), kwargs, depends_on_user(request, user_params)
+            )
+            cached = await cache.aget(key)
+            if cached is not None:
+                return HttpResponse(cached, content_type='application/json')
+
+            response = await view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and not await amay_be_stale(scopes):
+                await cache.aset(
+                    key, response.content,
+                    timeout if timeout is not None else getattr(settings, 'LEAGUE_CACHE_TIMEOUT', 300)
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def async_conditional_response(*scopes, user_params=()):
+    """`conditional_response` for async function views."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user_specific = depends_on_user(request, user_params)
+            etag = response_etag(request, scopes, await aget_versions(scopes), user_specific)
+            if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if etag in if_none_match:
+                response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK or await amay_be_stale(scopes):
+                    return response
+                if '*' in if_none_match:
+                    # Matches any current representation, so only once the handler found one
+                    response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+
+            response['ETag'] = etag
+            if user_specific:
+                patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+import contextvars
+import hashlib
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Apps whose reads may be served by a replica; auth and sessions always read the primary
+REPLICATED_APPS = {'league'}
+
+_read_routing = contextvars.ContextVar('read_routing', default=None)
+# Replica alias -> time.monotonic() until which it is skipped after a failed connection
+_unavailable_until = {}
+
+
+def get_replica_settings():
+    return {
+        'ALIASES': [],
+        'PIN_SECONDS': 10,
+        'RETRY_AFTER': 30,
+        'CACHE_ALIAS': 'default',
+        **getattr(settings, 'DATABASE_REPLICAS', {}),
+    }
+
+
+class ReadRouting:
+    """Replica chosen for the current request, if any, and whether a query was actually sent to it."""
+    __slots__ = ('alias', 'used')
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.used = False
+
+
+def read_from_replica():
+    routing = _read_routing.get()
+    return bool(routing and routing.used)
+
+
+def choose_replica(aliases, retry_after):
+    """A random replica that accepts connections, or None to read from the primary."""
+    now = time.monotonic()
+    candidates = [alias for alias in aliases if _unavailable_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            connections[alias].ensure_connection()
+            return alias
+        except DatabaseError as err:
+            _unavailable_until[alias] = now + retry_after
+            logger.warning(f"Replica '{alias}' is unavailable, reading from the primary for {retry_after}s: {err}")
+    return None
+
+
+def pin_key(request):
+    # Clients are told apart by their credentials, so pinning needs no authentication query
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return f'replica:pin:{hashlib.sha256(credentials.encode()).hexdigest()[:32]}'
+
+
+class ReplicaRouter:
+    """
+    Sends reads of league data to the replica picked by `ReplicaRoutingMiddleware` for the current
+    request. Everything else goes to the primary: writes, reads inside a transaction (so a
+    select_for_update and the rows it checks come from the same database), reads of other apps,
+    and reads outside a request.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _read_routing.get()
+        if routing is None or routing.alias is None or model._meta.app_label not in REPLICATED_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        routing.used = True
+        return routing.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Picks the database for the reads of every request. Safe requests go to a replica listed in
+    DATABASE_REPLICAS['ALIASES'], unless the client sent a successful unsafe request in the last
+    PIN_SECONDS, which pins it to the primary so it reads its own writes (e.g. my-team right after
+    a buy). Pins are kept in the CACHE_ALIAS cache, which must not evict them early and must be shared
+    by every process serving the client. A replica that fails to connect is skipped for RETRY_AFTER
+    seconds.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_replica_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def pins(self):
+        # Looked up per request, as cache connections belong to a thread
+        return caches[self.options['CACHE_ALIAS']]
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.options['ALIASES']:
+            return self.get_response(request)
+
+        key = pin_key(request)
+        alias = None
+        if request.method in SAFE_METHODS and not (key and self.pins.get(key)):
+            alias = choose_replica(self.options['ALIASES'], self.options['RETRY_AFTER'])
+
+        token = _read_routing.set(ReadRouting(alias))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_routing.reset(token)
+
+        if request.method not in SAFE_METHODS and key and response.status_code < 400:
+            self.pins.set(key, True, self.options['PIN_SECONDS'])
+        return response
+
+    async def __acall__(self, request):
+        if not self.options['ALIASES']:
+            return await self.get_response(request)
+
+        key = pin_key(request)
+        alias = None
+        if request.method in SAFE_METHODS and not (key and await self.pins.aget(key)):
+            # Connections belong to the thread the async ORM queries from, so check the replica there
+            alias = await sync_to_async(choose_replica)(self.options['ALIASES'], self.options['RETRY_AFTER'])
+
+        token = _read_routing.set(ReadRouting(alias))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_routing.reset(token)
+
+        if request.method not in SAFE_METHODS and key and response.status_code < 400:
+            await self.pins.aset(key, True, self.options['PIN_SECONDS'])
+        return response
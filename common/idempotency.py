@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.renderers import RawJSON, encode_json
+from common.utils import generate_response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+# Deletes a lock only if it still holds the releasing request's token, as one Redis operation
+RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+# Serializes taking and releasing locks in this process, for caches that can't compare-and-delete
+_lock_guard = threading.Lock()
+
+
+def get_idempotency_settings():
+    return {
+        'CACHE_ALIAS': 'default',
+        'TTL': 86400,
+        'LOCK_TIMEOUT': 30,
+        'WAIT': 10,
+        **getattr(settings, 'IDEMPOTENCY', {}),
+    }
+
+
+def get_idempotency_cache():
+    return caches[get_idempotency_settings()['CACHE_ALIAS']]
+
+
+def idempotency_cache_key(request, key):
+    view_name = request.resolver_match.view_name if request.resolver_match else request.path
+    digest = hashlib.sha256(f'{request.user.pk}|{view_name}|{key}'.encode()).hexdigest()
+    return f'league:idempotency:{digest}'
+
+
+def request_fingerprint(request, view_kwargs):
+    try:
+        body = request.body
+    except RawPostDataException:  # The stream was already parsed, fall back to the parsed data
+        body = encode_json(request.data)
+    digest = hashlib.sha256(f'{request.method}|{sorted(view_kwargs.items())}|'.encode())
+    digest.update(body)
+    return digest.hexdigest()[:32]
+
+
+def redis_client(cache):
+    """Client of a Redis cache (Django's backend or django-redis), or None for other backends."""
+    if isinstance(cache, RedisCache):
+        return cache._cache.get_client(write=True)
+    client = getattr(cache, 'client', None)
+    if hasattr(client, 'get_client'):
+        return client.get_client(write=True)
+    return None
+
+
+def acquire_lock(cache, lock_key, token, timeout):
+    with _lock_guard:
+        return cache.add(lock_key, token, timeout=timeout)
+
+
+def release_lock(cache, lock_key, token):
+    """
+    Delete the lock if it still holds `token`, leaving it to a retry that took it after it expired.
+
+    Redis compares and deletes in one script (tokens are integers, which both Redis backends store
+    unserialized). Other caches have no such operation, so the check and the delete are only atomic
+    among the requests of this process: that covers locmem, but on a cache shared with other processes
+    a lock expiring between them can still be deleted. LOCK_TIMEOUT must stay well above the slowest
+    handler there.
+    """
+    client = redis_client(cache)
+    if client is not None:
+        client.eval(RELEASE_LOCK_SCRIPT, 1, cache.make_and_validate_key(lock_key), token)
+        return
+    with _lock_guard:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return generate_response(
+            message="Idempotency-Key was already used with a different request.",
+            success=False,
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(data=stored['data'], status=stored['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    `Idempotency-Key` support for unsafe handlers (create, buy, set-for-sale).
+
+    The first request with a key runs the handler and its response is stored for IDEMPOTENCY['TTL']
+    seconds under the user, the endpoint and the key, with `data` kept as encoded JSON. A retry with the
+    same key and body gets the stored response back without running the handler; the same key with a
+    different body is rejected with 422. A duplicate that arrives while the first one is still running
+    waits for its response (up to IDEMPOTENCY['WAIT'] seconds, then 409), so concurrent retries execute
+    once. 5xx responses are not stored, so the client can retry them. Requests without the header are
+    not affected.
+
+    Records and locks live in the IDEMPOTENCY['CACHE_ALIAS'] cache, which must not evict them before
+    their TTL. Keys are only deduplicated among the processes sharing that cache: with the default
+    per-process locmem backend a retry that reaches another worker runs again.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return generate_response(
+                message=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.",
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        options = get_idempotency_settings()
+        cache = get_idempotency_cache()
+        cache_key = idempotency_cache_key(request, key)
+        lock_key = f'{cache_key}:lock'
+        fingerprint = request_fingerprint(request, kwargs)
+        # Identifies this request's lock, which may have expired and been taken by a retry in the meantime
+        token = secrets.randbits(63)
+
+        deadline = time.monotonic() + options['WAIT']
+        while True:
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            if acquire_lock(cache, lock_key, token, options['LOCK_TIMEOUT']):
+                break
+            if time.monotonic() >= deadline:
+                return generate_response(
+                    message="A request with this Idempotency-Key is still in progress.",
+                    success=False,
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(0.05)
+
+        started = time.monotonic()
+        try:
+            # The first request may have finished between the lookup and taking the lock
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if time.monotonic() - started >= options['LOCK_TIMEOUT']:
+                logger.warning(
+                    f"Idempotent request outlasted IDEMPOTENCY['LOCK_TIMEOUT'] ({options['LOCK_TIMEOUT']}s), "
+                    f"so a duplicate may have run concurrently: {request.method} {request.path}"
+                )
+            if response.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+                envelope = dict(response.data or {})
+                if 'data' in envelope:
+                    envelope['data'] = RawJSON(encode_json(envelope['data']))
+                cache.set(
+                    cache_key,
+                    {'fingerprint': fingerprint, 'status': response.status_code, 'data': envelope},
+                    options['TTL']
+                )
+            return response
+        finally:
+            release_lock(cache, lock_key, token)
+    return wrapper
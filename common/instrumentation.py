@@ -0,0 +1,286 @@
+import atexit
+import contextvars
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from common.logging_middleware import get_request_log_pipeline
+from common.renderers import encode_json
+
+# Histogram bucket i holds samples up to BUCKET_BASE * BUCKET_GROWTH ** i, so percentiles are within ~19%
+BUCKET_BASE = 0.1
+BUCKET_GROWTH = 2 ** 0.25
+HISTOGRAM_METRICS = ('wall_ms', 'db_ms', 'serialize_ms', 'queries')
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+def get_instrumentation_settings():
+    return {
+        'ENABLED': True,
+        'QUERY_BUDGET': 20,
+        'WINDOW': 3600,
+        'FLUSH_INTERVAL': 10,
+        'DIR': os.path.join(getattr(settings, 'REQUEST_LOG_DIR', 'logs'), 'metrics'),
+        **getattr(settings, 'REQUEST_INSTRUMENTATION', {}),
+    }
+
+
+class RequestMetrics:
+    """Query count, DB time and serializer time of the current request, collected by the hooks below."""
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by count_query around every query of the current request
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def count_query(execute, sql, params, many, context):
+    """Permanent execute wrapper of every connection, timing the query for the request that runs it, if any."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_hook(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+# Connections are thread-local and the async ORM queries from a worker thread, so rather than wrapping
+# the request thread's connections per request, every connection gets the hook when it connects
+connection_created.connect(install_query_hook)
+
+
+class TimedSerializerMixin:
+    """Adds the time spent in the outermost to_representation() to the current request's serializer time."""
+
+    def to_representation(self, instance):
+        metrics = current_metrics()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+
+class Histogram:
+    """Log-bucketed histogram; bucket counts from several processes merge by addition."""
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or {}
+
+    def add(self, value):
+        index = 0 if value <= BUCKET_BASE else math.ceil(math.log(value / BUCKET_BASE, BUCKET_GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def percentile(self, pct):
+        rank = math.ceil(pct / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= max(rank, 1):
+                return round(BUCKET_BASE * BUCKET_GROWTH ** index, 3)
+        return None
+
+
+class MetricsStore:
+    """
+    Rolling per-url_name histograms of this process.
+
+    Samples go to the current window, which becomes the previous one after `window` seconds, so a
+    snapshot covers between one and two windows. The snapshot is written to `<directory>/<pid>.json`
+    at most every `flush_interval` seconds and at exit, where `load_snapshots` merges all processes.
+    """
+
+    def __init__(self, directory, window=3600, flush_interval=10):
+        self.directory = directory
+        self.window = window
+        self.flush_interval = flush_interval
+        self.current, self.previous = {}, {}
+        self.window_start = self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, url_name, sample):
+        with self._lock:
+            now = time.monotonic()
+            if now - self.window_start >= self.window:
+                self.previous, self.current = self.current, {}
+                self.window_start = now
+            histograms = self.current.setdefault(url_name, {metric: Histogram() for metric in HISTOGRAM_METRICS})
+            for metric in HISTOGRAM_METRICS:
+                histograms[metric].add(sample[metric])
+            flush = now - self.last_flush >= self.flush_interval
+            if flush:
+                self.last_flush = now
+        if flush:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            merged = {}
+            for window in (self.previous, self.current):
+                for url_name, histograms in window.items():
+                    target = merged.setdefault(url_name, {metric: Histogram() for metric in HISTOGRAM_METRICS})
+                    for metric, histogram in histograms.items():
+                        target[metric].merge(histogram)
+        return {
+            url_name: {metric: histogram.buckets for metric, histogram in histograms.items()}
+            for url_name, histograms in merged.items()
+        }
+
+    def flush(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{os.getpid()}.json')
+            with open(f'{path}.tmp', 'w', encoding='utf-8') as snapshot_file:
+                json.dump({'pid': os.getpid(), 'written_at': time.time(), 'endpoints': self.snapshot()}, snapshot_file)
+            os.replace(f'{path}.tmp', path)
+        except OSError:
+            pass
+
+
+def load_snapshots(directory):
+    """Merge the snapshots of every process into {url_name: {metric: Histogram}}."""
+    merged = {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path, encoding='utf-8') as snapshot_file:
+                endpoints = json.load(snapshot_file)['endpoints']
+        except (OSError, ValueError, KeyError):
+            continue
+        for url_name, metrics in endpoints.items():
+            target = merged.setdefault(url_name, {metric: Histogram() for metric in HISTOGRAM_METRICS})
+            for metric, buckets in metrics.items():
+                if metric in target:
+                    target[metric].merge(Histogram({int(index): count for index, count in buckets.items()}))
+    return merged
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                options = get_instrumentation_settings()
+                _store = MetricsStore(options['DIR'], options['WINDOW'], options['FLUSH_INTERVAL'])
+                atexit.register(_store.flush)
+    return _store
+
+
+class InstrumentationMiddleware:
+    """
+    Measures every request, sync or async: query count and DB time through the `count_query` execute
+    wrapper of every connection, serializer time through `TimedSerializerMixin`, and wall time. The
+    numbers go out as a `Server-Timing` header, a JSON line in `logs/request_metrics.log` and the rolling
+    histograms of `MetricsStore`. Requests running more than REQUEST_INSTRUMENTATION['QUERY_BUDGET'] queries are
+    logged as warnings. Wall time of streaming responses stops when the first byte is ready.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_instrumentation_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.options['ENABLED']:
+            return self.get_response(request)
+
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_hook(connection)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.options['ENABLED']:
+            return await self.get_response(request)
+
+        # The async ORM runs queries in a worker thread with a copy of this context, so count_query
+        # finds this request's metrics there
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - start)
+
+    def record(self, request, response, metrics, wall_time):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        sample = {
+            'wall_ms': round(wall_time * 1000, 3),
+            'db_ms': round(metrics.db_time * 1000, 3),
+            'serialize_ms': round(metrics.serializer_time * 1000, 3),
+            'queries': metrics.queries,
+        }
+        response['Server-Timing'] = (
+            f'db;dur={sample["db_ms"]};desc="{metrics.queries} queries", '
+            f'serialize;dur={sample["serialize_ms"]}, total;dur={sample["wall_ms"]}'
+        )
+        get_metrics_store().record(url_name or 'unresolved', sample)
+
+        over_budget = metrics.queries > self.options['QUERY_BUDGET']
+        logger = get_request_log_pipeline().get_logger('request_metrics')
+        line = encode_json({
+            'url_name': url_name, 'method': request.method, 'path': request.path, 'status': response.status_code,
+            **sample, 'over_query_budget': over_budget,
+        }).decode()
+        if over_budget:
+            logger.warning(line)
+        else:
+            logger.info(line)
+        return response
@@ -1,40 +1,191 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
-class LoggingMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
 
-    def __call__(self, request):
-        response = self.get_response(request)
-        return response
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue without touching the disk on the request thread.
+
+    When the queue is full the 'drop' policy discards the record straight away, while the 'block'
+    policy waits up to `block_timeout` seconds for the writer thread to catch up before dropping it.
+    """
+
+    def __init__(self, log_queue, policy='drop', block_timeout=1.0):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EndpointFileHandler(logging.Handler):
+    """Writes every record to `<directory>/<logger name>.log`, the logger name being the url_name."""
+
+    def __init__(self, directory):
+        super().__init__(logging.DEBUG)
+        self.directory = directory
+        self.streams = {}
+        self.setFormatter(logging.Formatter('{levelname} {asctime} {module} {message}', style='{'))
+
+    def emit(self, record):
+        try:
+            stream = self.streams.get(record.name)
+            if stream is None:
+                os.makedirs(self.directory, exist_ok=True)
+                stream = open(os.path.join(self.directory, f'{record.name}.log'), 'a', encoding='utf-8')
+                self.streams[record.name] = stream
+            stream.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            for stream in self.streams.values():
+                stream.flush()
+
+    def close(self):
+        with self.lock:
+            for stream in self.streams.values():
+                stream.close()
+            self.streams = {}
+        super().close()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that drains up to `batch_size` records per wake-up and flushes the files once per batch."""
+
+    def __init__(self, log_queue, *handlers, batch_size=500):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
 
-    def process_view(self, request, view_func, view_args, view_kwargs):
-        url_name = request.resolver_match.url_name
+    def enqueue_sentinel(self):
+        # Wait for room instead of failing when the bounded queue is full at shutdown
+        self.queue.put(self._sentinel)
 
-        # Create a log file for each endpoint
-        log_file = os.path.join('logs', f'{url_name}.log')
+    def _monitor(self):
+        stop = False
+        while not stop:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            for _ in batch:
+                self.queue.task_done()
 
-        # Create a logger for this endpoint
-        logger = logging.getLogger(url_name)
+
+class RequestLogPipeline:
+    """
+    Per-endpoint loggers that hand records to a single background writer thread.
+
+    Request threads only enqueue records; the listener thread appends them to `logs/<url_name>.log`.
+    Memory is bounded by `queue_size` records and `stop()` drains the queue before closing the files.
+    """
+
+    def __init__(self, directory='logs', queue_size=10000, policy='drop', block_timeout=1.0, batch_size=500):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = BoundedQueueHandler(self.queue, policy=policy, block_timeout=block_timeout)
+        self.file_handler = EndpointFileHandler(directory)
+        self.listener = BatchingQueueListener(self.queue, self.file_handler, batch_size=batch_size)
+        self.started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if not self.started:
+                self.listener.start()
+                self.started = True
+
+    def stop(self):
+        with self._lock:
+            if self.started:
+                self.listener.stop()
+                self.file_handler.close()
+                self.started = False
+        if self.queue_handler.dropped:
+            logging.getLogger(__name__).warning(f"{self.queue_handler.dropped} request log records were dropped.")
+
+    def get_logger(self, name):
+        self.start()
+        logger = logging.getLogger(name)
 
         # Set the logger level to DEBUG
         logger.setLevel(logging.DEBUG)
 
         # Check if a handler already exists to avoid duplicate handlers
-        if not logger.handlers:
-            # Create a file handler
-            handler = logging.FileHandler(log_file)
+        if self.queue_handler not in logger.handlers:
+            logger.addHandler(self.queue_handler)
+        return logger
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
 
-            # Set the log level
-            handler.setLevel(logging.DEBUG)
 
-            # Set the formatter
-            formatter = logging.Formatter('{levelname} {asctime} {module} {message}', style='{')
-            handler.setFormatter(formatter)
+def get_request_log_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = RequestLogPipeline(
+                    directory=getattr(settings, 'REQUEST_LOG_DIR', 'logs'),
+                    queue_size=getattr(settings, 'REQUEST_LOG_QUEUE_SIZE', 10000),
+                    policy=getattr(settings, 'REQUEST_LOG_QUEUE_POLICY', 'drop'),
+                    block_timeout=getattr(settings, 'REQUEST_LOG_BLOCK_TIMEOUT', 1.0),
+                )
+                # Flush everything still queued when the process exits
+                atexit.register(_pipeline.stop)
+    return _pipeline
+
+
+class LoggingMiddleware:
+    """Attaches the endpoint logger (`logs/<url_name>.log`) to the request as `request.logger`."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.attach_logger(request)
+        return self.get_response(request)
 
-            logger.addHandler(handler)
+    async def __acall__(self, request):
+        self.attach_logger(request)
+        return await self.get_response(request)
 
-        # Attach the logger to the request object for use in views
-        request.logger = logger
+    @staticmethod
+    def attach_logger(request):
+        # Resolved on first use, once the URL has been resolved; a process_view hook would cost async
+        # views a thread switch
+        request.logger = SimpleLazyObject(
+            lambda: get_request_log_pipeline().get_logger(request.resolver_match.url_name)
+        )
@@ -0,0 +1,87 @@
+import json
+
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, falls back to the standard library encoder
+    orjson = None
+
+
+class RawJSON:
+    """
+    JSON that is already encoded, e.g. a cached `data` payload.
+
+    Pass it as a top-level value of the response envelope (`generate_response(data=RawJSON(...))`)
+    and `FastJSONRenderer` splices the bytes into the output without decoding or re-encoding them.
+    """
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content if isinstance(content, bytes) else content.encode()
+
+    def __eq__(self, other):
+        return isinstance(other, RawJSON) and other.content == self.content
+
+    def __hash__(self):
+        return hash(self.content)
+
+    def loads(self):
+        return json.loads(self.content)
+
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Same representation as DRF's JSONEncoder: Decimal as a number, datetime as ISO 8601 with 'Z' and milliseconds
+    if isinstance(obj, Promise):
+        return str(obj)
+    return _drf_encoder.default(obj)
+
+
+def encode_json(data):
+    """Encode `data` to compact UTF-8 JSON bytes with orjson when it is installed."""
+    if orjson is not None:
+        content = orjson.dumps(
+            data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+    else:
+        content = json.dumps(
+            data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode()
+    # Keep the output a strict JavaScript subset, like DRF's JSONRenderer
+    return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when available and splices `RawJSON` values of
+    the top-level dict into the output as-is. Indented output (browsable API, `; indent=`) goes
+    through the standard DRF path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        raw_values = {}
+        if isinstance(data, dict):
+            raw_values = {key: value for key, value in data.items() if isinstance(value, RawJSON)}
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            if raw_values:
+                data = {key: value.loads() if key in raw_values else value for key, value in data.items()}
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if not raw_values:
+            return encode_json(data)
+
+        # Encode the envelope with a placeholder per raw value, then swap in the pre-encoded bytes
+        placeholders = {key: f'\x00raw:{key}\x00' for key in raw_values}
+        content = encode_json({key: placeholders.get(key, value) for key, value in data.items()})
+        for key, raw in raw_values.items():
+            content = content.replace(encode_json(placeholders[key]), raw.content, 1)
+        return content
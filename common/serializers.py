@@ -0,0 +1,91 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_paths(value):
+    """Turn 'id,team.name,team.owner' into {'id': {}, 'team': {'name': {}, 'owner': {}}}."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for read requests, driven by the `?fields=` and `?expand=` query parameters.
+
+    `fields` lists the fields to render, with dotted paths for nested ones (`fields=id,name,team.name`); a nested
+    field listed without sub-fields keeps all of them. `expand`, when given, lists the nested serializers to embed
+    (`expand=team,team.owner`) and renders the other ones as their primary key. Without either parameter the output
+    is unchanged. Pruned fields are removed before serialization, so they are never evaluated, and
+    `select_related_paths()` returns only the joins the remaining fields read.
+    """
+    # Method fields that render a nested serializer: name -> (serializer class, relations it is read from)
+    expandable_methods = {}
+
+    def get_sparse_spec(self):
+        spec = getattr(self, '_sparse_spec', None)
+        if spec is None:
+            spec = (None, None)
+            parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+            request = self.context.get('request')
+            # Only the root serializer reads the query string, and never for writes where fields are also inputs
+            if parent is None and request is not None and request.method in SAFE_METHODS:
+                params = request.query_params
+                spec = (
+                    parse_field_paths(params['fields']) if params.get('fields') else None,
+                    parse_field_paths(params['expand']) if 'expand' in params else None,
+                )
+            self._sparse_spec = spec
+        return spec
+
+    def nested_spec(self, name):
+        only, expand = self.get_sparse_spec()
+        return (only or {}).get(name) or None, None if expand is None else expand.get(name, {})
+
+    def is_expanded(self, name):
+        expand = self.get_sparse_spec()[1]
+        return expand is None or name in expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only = self.get_sparse_spec()[0]
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        for name, field in fields.items():
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+            if not self.is_expanded(name):
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+            else:
+                field._sparse_spec = self.nested_spec(name)
+        return fields
+
+    def serialize_method_field(self, name, instance):
+        """Render an `expandable_methods` field with the same pruning as a declared nested serializer."""
+        serializer = self.expandable_methods[name][0](instance)
+        serializer._sparse_spec = self.nested_spec(name)
+        return serializer.data
+
+    def select_related_paths(self, prefix=''):
+        paths = []
+        for name, field in self.fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                path = prefix + field.source.replace('.', '__')
+                paths.append(path)
+                if isinstance(field, SparseFieldsMixin):
+                    paths += field.select_related_paths(f'{path}__')
+            elif name in self.expandable_methods:
+                if self.is_expanded(name):
+                    serializer_class, relations = self.expandable_methods[name]
+                    nested = serializer_class()
+                    nested._sparse_spec = self.nested_spec(name)
+                    for relation in relations:
+                        paths += [prefix + relation, *nested.select_related_paths(f'{prefix}{relation}__')]
+            elif len(field.source_attrs) > 1:
+                # Plain fields read through a relation, e.g. source='player.name'
+                paths.append(prefix + '__'.join(field.source_attrs[:-1]))
+        return paths
@@ -1,7 +1,14 @@
+from contextlib import contextmanager
+
+from django.http import HttpResponse
 from rest_framework.response import Response
 
+from common.renderers import FastJSONRenderer
+
 
-def generate_response(success=True, message='success', status=200, custom_code=0, data=None, errors=None):
+def response_envelope(success=True, message='success', status=200, custom_code=0, data=None, errors=None,
+                      pagination=None):
+    # `data` may be a common.renderers.RawJSON holding already encoded JSON, which is written out as-is
     resp_data = {
         "success": success,
         "message": message,
@@ -12,7 +19,43 @@ def generate_response(success=True, message='success', status=200, custom_code=0
         resp_data["data"] = data
     if errors is not None:
         resp_data["errors"] = errors
+    if pagination is not None:
+        resp_data.update(pagination)
+    return resp_data
+
 
+def generate_response(success=True, message='success', status=200, custom_code=0, data=None, errors=None,
+                      pagination=None):
     return Response(
-        data=resp_data, status=status
+        data=response_envelope(success, message, status, custom_code, data, errors, pagination), status=status
     )
+
+
+def json_response(content, status=200):
+    """Plain Django JSON response for the async views, which don't go through DRF's rendering."""
+    if not isinstance(content, bytes):
+        content = FastJSONRenderer().render(content)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+def generate_json_response(success=True, message='success', status=200, custom_code=0, data=None, errors=None,
+                           pagination=None):
+    """generate_response() for the async views."""
+    return json_response(response_envelope(success, message, status, custom_code, data, errors, pagination), status)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we generate instead of stamping now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,257 @@
+"""
+Native async versions of the read-heavy league endpoints, served under `api/async/`.
+
+DRF has no async views, so these are plain Django async function views that reuse the DRF
+serializers, the keyset paginator and the response cache. They query with the async ORM and
+return the same envelope as their sync counterparts, which makes them drop-in replacements for
+clients behind an ASGI server (see fantasy_football.asgi).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from common.cache import async_cached_response, async_conditional_response, TEAMS, PLAYERS, TRANSACTIONS
+from common.constants import STH_WENT_WRONG_MSG, BAD_REQUEST
+from common.pagination import KeysetPagination
+from common.utils import generate_json_response
+from league.models import Team, Player, Transaction
+from league.serializers import TeamSerializer, PlayerSerializer, MarketFilterSerializer, \
+    TransactionsHistorySerializer
+
+
+def async_read_view(view):
+    """
+    Wraps the request in a DRF `Request`, so serializers, the paginator and the cache decorators read
+    `query_params` and `user` as they do in the sync views, and only lets safe methods through.
+    Authentication queries the database, so it runs in a thread, and only when credentials were sent.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return generate_json_response(
+                message=f'Method "{request.method}" not allowed.',
+                success=False,
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        drf_request = Request(
+            request, authenticators=[authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        )
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                await sync_to_async(getattr)(drf_request, 'user')
+        except (AuthenticationFailed, NotAuthenticated) as err:
+            return generate_json_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return await view(drf_request, *args, **kwargs)
+    return wrapper
+
+
+@async_read_view
+@async_conditional_response(TEAMS)
+@async_cached_response(TEAMS)
+async def team_list(request):
+    try:
+        paginator = KeysetPagination()
+        serializer = TeamSerializer(context={'request': request})
+        teams = await paginator.apaginate_queryset(
+            Team.objects.for_listing(serializer.select_related_paths()), request
+        )
+        serializer = TeamSerializer(teams, many=True, context={'request': request})
+        return paginator.get_json_paginated_response(serializer.data)
+    except NotFound as err:
+        return generate_json_response(
+            message=err.detail,
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting teams. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(TEAMS)
+@async_cached_response(TEAMS)
+async def team_detail(request, pk):
+    try:
+        serializer = TeamSerializer(context={'request': request})
+        team = await Team.objects.for_listing(serializer.select_related_paths()).aget(id=pk)
+        serializer = TeamSerializer(team, context={'request': request})
+        return generate_json_response(data=serializer.data)
+    except Team.DoesNotExist:
+        return generate_json_response(
+            message="Team not found",
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting team. Team: {pk}. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(PLAYERS, TEAMS)
+@async_cached_response(PLAYERS, TEAMS)
+async def player_list(request):
+    try:
+        paginator = KeysetPagination()
+        serializer = PlayerSerializer(context={'request': request})
+        players = await paginator.apaginate_queryset(
+            Player.objects.with_team(serializer.select_related_paths()), request
+        )
+        serializer = PlayerSerializer(players, many=True, context={'request': request})
+        return paginator.get_json_paginated_response(serializer.data)
+    except NotFound as err:
+        return generate_json_response(
+            message=err.detail,
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting players. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(PLAYERS, TEAMS)
+@async_cached_response(PLAYERS, TEAMS)
+async def player_detail(request, pk):
+    try:
+        serializer = PlayerSerializer(context={'request': request})
+        player = await Player.objects.with_team(serializer.select_related_paths()).aget(id=pk)
+        serializer = PlayerSerializer(player, context={'request': request})
+        return generate_json_response(data=serializer.data)
+    except Player.DoesNotExist:
+        return generate_json_response(
+            message="Player not found",
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while fetching players. Player: {pk}. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(PLAYERS, TEAMS, user_params=['exclude_my_team'])
+@async_cached_response(PLAYERS, TEAMS, user_params=['exclude_my_team'])
+async def players_for_sale(request):
+    try:
+        filters = MarketFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        options = filters.validated_data
+        my_team_id = None
+        if options['exclude_my_team'] and request.user.is_authenticated:
+            my_team_id = await Team.objects.filter(user_id=request.user.pk).values_list('id', flat=True).afirst()
+
+        paginator = KeysetPagination()
+        paginator.ordering = MarketFilterSerializer.SORT_ORDERINGS[options['sort']]
+        serializer = PlayerSerializer(context={'request': request})
+        players = await paginator.apaginate_queryset(
+            Player.objects.with_team(serializer.select_related_paths()).on_market(
+                positions=options.get('position'),
+                min_price=options.get('min_price'),
+                max_price=options.get('max_price'),
+                min_value=options.get('min_value'),
+                max_value=options.get('max_value'),
+                exclude_team_id=my_team_id,
+            ),
+            request
+        )
+        serializer = PlayerSerializer(players, many=True, context={'request': request})
+        return paginator.get_json_paginated_response(serializer.data)
+    except ValidationError as err:
+        return generate_json_response(
+            message=BAD_REQUEST,
+            success=False,
+            status=status.HTTP_400_BAD_REQUEST,
+            errors=err.detail
+        )
+    except NotFound as err:
+        return generate_json_response(
+            message=err.detail,
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting players for purchase. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(TRANSACTIONS, PLAYERS, TEAMS)
+@async_cached_response(TRANSACTIONS, PLAYERS, TEAMS)
+async def transactions_history(request):
+    try:
+        paginator = KeysetPagination()
+        serializer = TransactionsHistorySerializer(context={'request': request})
+        transactions = await paginator.apaginate_queryset(
+            Transaction.objects.with_teams(serializer.select_related_paths()), request
+        )
+        serializer = TransactionsHistorySerializer(transactions, many=True, context={'request': request})
+        return paginator.get_json_paginated_response(serializer.data)
+    except NotFound as err:
+        return generate_json_response(
+            message=err.detail,
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting transactions. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_read_view
+@async_conditional_response(TRANSACTIONS, PLAYERS, TEAMS)
+@async_cached_response(TRANSACTIONS, PLAYERS, TEAMS)
+async def transaction_history(request, pk):
+    try:
+        serializer = TransactionsHistorySerializer(context={'request': request})
+        transaction = await Transaction.objects.with_teams(serializer.select_related_paths()).aget(id=pk)
+        serializer = TransactionsHistorySerializer(transaction, context={'request': request})
+        return generate_json_response(data=serializer.data)
+    except Transaction.DoesNotExist:
+        return generate_json_response(
+            message="Transaction not found.",
+            success=False,
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as err:
+        request.logger.exception(f"Exception occurred while getting transaction '{pk}'. Error: {err}")
+        return generate_json_response(
+            message=STH_WENT_WRONG_MSG,
+            success=False,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
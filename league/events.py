@@ -0,0 +1,195 @@
+"""
+Live transfer market events, fanned out in-process to Server-Sent Events subscribers.
+
+Market writes publish `listed`, `delisted` and `sold` events once their transaction commits. Each
+event is encoded once into an SSE frame and appended to every subscriber's bounded queue; a client
+that falls behind by more than QUEUE_SIZE events is disconnected instead of slowing publishers down,
+and picks up where it stopped by reconnecting with `Last-Event-ID`. The last HISTORY events are kept
+for those resumes. Event ids are `<broker epoch>-<sequence>`, so ids from another process or from
+before a restart are recognised and answered with a `reset` event telling the client to reload the
+market instead.
+"""
+import asyncio
+import itertools
+import threading
+import uuid
+from collections import deque
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from common.renderers import encode_json
+
+LISTED, DELISTED, SOLD, RESET = 'listed', 'delisted', 'sold', 'reset'
+
+
+def get_market_event_settings():
+    return {
+        'HISTORY': 1000,
+        'QUEUE_SIZE': 100,
+        'KEEPALIVE': 15,
+        **getattr(settings, 'MARKET_EVENTS', {}),
+    }
+
+
+class MarketEvent:
+    __slots__ = ('sequence', 'id', 'type', 'data', 'frame')
+
+    def __init__(self, sequence, event_id, event_type, data):
+        self.sequence, self.id, self.type, self.data = sequence, event_id, event_type, data
+        id_line = f'id: {event_id}\n' if event_id else ''
+        self.frame = f'{id_line}event: {event_type}\ndata: '.encode() + encode_json(data) + b'\n\n'
+
+
+class Subscription:
+    """Bounded queue of one subscriber, drained by a sync (`get`) or async (`aget`) consumer."""
+
+    def __init__(self, queue_size, backlog=()):
+        self.queue_size = queue_size
+        self.events = deque(backlog)
+        self.overflowed = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._async_ready = asyncio.Event()
+        self._loop = None
+
+    def put(self, event):
+        with self._lock:
+            if self.overflowed:
+                return
+            if len(self.events) >= self.queue_size:
+                # Later events are dropped too, so the stream ends at a gap-free point the client can resume from
+                self.overflowed = True
+            else:
+                self.events.append(event)
+            loop = self._loop
+        self._ready.set()
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                pass  # The consumer's event loop is closed
+
+    def take(self):
+        with self._lock:
+            self._ready.clear()
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def get(self, timeout):
+        """Queued events, waiting up to `timeout` seconds for one; [] on timeout."""
+        events = self.take()
+        if events:
+            return events
+        self._ready.wait(timeout)
+        return self.take()
+
+    async def aget(self, timeout):
+        if self._loop is None:
+            with self._lock:
+                self._loop = asyncio.get_running_loop()
+        self._async_ready.clear()
+        events = self.take()
+        if events:
+            return events
+        try:
+            await asyncio.wait_for(self._async_ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self.take()
+
+
+class MarketEventBroker:
+    def __init__(self, history_size=1000, queue_size=100):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self.history = deque(maxlen=history_size)
+        self.subscriptions = set()
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        with self._lock:
+            sequence = next(self._sequence)
+            event = MarketEvent(sequence, f'{self.epoch}-{sequence}', event_type, data)
+            self.history.append(event)
+            for subscription in self.subscriptions:
+                subscription.put(event)
+        return event
+
+    def subscribe(self, last_event_id=None):
+        """
+        A new subscription receiving every event published from now on, preceded by the events after
+        `last_event_id`, or by a `reset` event when those are no longer (or were never) in the history.
+        """
+        with self._lock:
+            backlog = self.backlog(last_event_id) if last_event_id else []
+            subscription = Subscription(self.queue_size, backlog)
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions.discard(subscription)
+
+    def backlog(self, last_event_id):
+        epoch, _, sequence = last_event_id.partition('-')
+        last_sequence = int(sequence) if sequence.isdigit() else None
+        oldest = self.history[0].sequence if self.history else 1
+        newest = self.history[-1].sequence if self.history else 0
+        if epoch != self.epoch or last_sequence is None or not oldest - 1 <= last_sequence <= newest:
+            return [MarketEvent(None, None, RESET, {'reason': 'Missed events are not available, reload the market.'})]
+        return [event for event in self.history if event.sequence > last_sequence]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_market_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                options = get_market_event_settings()
+                _broker = MarketEventBroker(options['HISTORY'], options['QUEUE_SIZE'])
+    return _broker
+
+
+def publish_on_commit(event_type, **data):
+    """Publish the event once the current transaction commits, so subscribers never see a rolled back change."""
+    # Amounts are sent as strings, like the DecimalFields of the API
+    data = {key: str(value) if isinstance(value, Decimal) else value for key, value in data.items()}
+    transaction.on_commit(lambda: get_market_broker().publish(event_type, data))
+
+
+def event_stream(last_event_id, keepalive):
+    """SSE body for WSGI servers; holds a worker thread for as long as the client stays connected."""
+    # Subscribed on the first read: a body that is never iterated (HEAD, closed unread) never runs `finally`
+    subscription = get_market_broker().subscribe(last_event_id)
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            events = subscription.get(keepalive)
+            # Comments keep proxies from timing out idle streams and reveal disconnected clients
+            yield b''.join(event.frame for event in events) if events else b': keepalive\n\n'
+            if subscription.overflowed:
+                return
+    finally:
+        get_market_broker().unsubscribe(subscription)
+
+
+async def aevent_stream(last_event_id, keepalive):
+    """SSE body for ASGI servers, waiting for events on the event loop instead of in a thread."""
+    subscription = get_market_broker().subscribe(last_event_id)
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            events = await subscription.aget(keepalive)
+            yield b''.join(event.frame for event in events) if events else b': keepalive\n\n'
+            if subscription.overflowed:
+                return
+    finally:
+        get_market_broker().unsubscribe(subscription)
@@ -0,0 +1,112 @@
+import csv
+import io
+from decimal import Decimal
+
+from django.db.models import F
+
+from common.renderers import encode_json
+from league.models import Transaction
+
+# Flat export columns, in output order
+TRANSACTION_EXPORT_FIELDS = [
+    'id', 'created_at', 'player_id', 'player_name', 'seller_team_id', 'seller_team_name', 'buyer_team_id',
+    'buyer_team_name', 'transfer_amount', 'inactive',
+]
+# Columns read through a join instead of from the transaction row
+RELATED_EXPORT_FIELDS = {
+    'player_name': F('player__name'),
+    'seller_team_name': F('seller_team__name'),
+    'buyer_team_name': F('buyer_team__name'),
+}
+
+
+def transaction_export_queryset(since=None):
+    queryset = Transaction.objects.order_by('created_at', 'id')
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    columns = [field for field in TRANSACTION_EXPORT_FIELDS if field not in RELATED_EXPORT_FIELDS]
+    return queryset.values(*columns, **RELATED_EXPORT_FIELDS)
+
+
+def transaction_rows(since=None, chunk_size=2000):
+    """
+    Flat transaction rows, oldest first, read with `iterator()` so only one chunk is held in memory
+    (a server-side cursor on PostgreSQL, fetchmany() batches on SQLite).
+    """
+    for row in transaction_export_queryset(since).iterator(chunk_size=chunk_size):
+        yield {field: row[field] for field in TRANSACTION_EXPORT_FIELDS}
+
+
+async def atransaction_rows(since=None, chunk_size=2000):
+    """`transaction_rows` for ASGI, fetching each chunk off the event loop with `aiterator()`."""
+    async for row in transaction_export_queryset(since).aiterator(chunk_size=chunk_size):
+        yield {field: row[field] for field in TRANSACTION_EXPORT_FIELDS}
+
+
+def export_value(value):
+    if isinstance(value, Decimal):
+        return str(value)  # Keep the exact amount, like DecimalField output in the API
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(records):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(records)
+    return buffer.getvalue()
+
+
+def encode_csv(rows):
+    return csv_lines([export_value(value) for value in row.values()] for row in rows)
+
+
+def encode_ndjson(rows):
+    return b''.join(encode_json({name: export_value(value) for name, value in row.items()}) + b'\n' for row in rows)
+
+
+def batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def abatched(rows, batch_size):
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(rows, batch_size=500):
+    """Yield CSV text a batch of rows at a time, starting with the header."""
+    yield csv_lines([TRANSACTION_EXPORT_FIELDS])
+    for batch in batched(rows, batch_size):
+        yield encode_csv(batch)
+
+
+def stream_ndjson(rows, batch_size=500):
+    """Yield newline delimited JSON, one object per row, a batch of rows at a time."""
+    for batch in batched(rows, batch_size):
+        yield encode_ndjson(batch)
+
+
+# Async bodies for ASGI servers, which would otherwise read a sync body whole before sending it
+async def astream_csv(rows, batch_size=500):
+    yield csv_lines([TRANSACTION_EXPORT_FIELDS])
+    async for batch in abatched(rows, batch_size):
+        yield encode_csv(batch)
+
+
+async def astream_ndjson(rows, batch_size=500):
+    async for batch in abatched(rows, batch_size):
+        yield encode_ndjson(batch)
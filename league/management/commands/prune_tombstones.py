@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from league.models import Tombstone
+from league.sync import get_sync_settings
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than LEAGUE_SYNC['TOMBSTONE_DAYS'], after which watermarks expire anyway."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Keep this many days instead of the configured retention.")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else get_sync_settings()['TOMBSTONE_DAYS']
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstone(s) older than {days} day(s)."))
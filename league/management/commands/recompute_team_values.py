@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum, Value, Subquery, OuterRef, F, DecimalField
+from django.db.models.functions import Coalesce, Round
+
+from common.cache import invalidate_on_commit, TEAMS
+from league.models import Team, Player
+
+
+class Command(BaseCommand):
+    help = "Recompute every team's stored total_value from its players, or verify it with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report teams whose stored total_value differs from the sum of their players' value.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = self.find_mismatches()
+            for team in mismatches:
+                self.stdout.write(f"Team {team.id}: stored {team.total_value}, expected {team.expected_value}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} team(s) have a stale total_value.")
+            self.stdout.write(self.style.SUCCESS("All team values are consistent."))
+            return
+
+        players_value = Player.objects.filter(team=OuterRef('pk')).values('team').annotate(
+            value=Sum('value')
+        ).values('value')
+        with transaction.atomic():
+            updated = Team.objects.update(
+                total_value=Coalesce(Subquery(players_value), Value(Decimal('0.00')), output_field=DecimalField())
+            )
+            invalidate_on_commit(TEAMS)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed total_value for {updated} team(s)."))
+
+    @staticmethod
+    def find_mismatches():
+        # Both sides are rounded to cents: SQLite sums decimals as floats, so comparing them as they are can
+        # flag values that only differ in the last binary digit
+        return list(
+            Team.objects.annotate(
+                expected_value=Coalesce(
+                    Sum('players__value'), Value(Decimal('0.00')), output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            ).alias(
+                stored_cents=Round('total_value', 2), expected_cents=Round('expected_value', 2)
+            ).exclude(stored_cents=F('expected_cents')).order_by('id')
+        )
@@ -0,0 +1,44 @@
+import glob
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from common.instrumentation import get_instrumentation_settings, load_snapshots
+
+PERCENTILES = (50, 95, 99)
+
+
+class Command(BaseCommand):
+    help = "Print per-endpoint p50/p95/p99 latency, DB time and query counts collected by InstrumentationMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the summary as JSON.")
+        parser.add_argument('--reset', action='store_true', help="Delete the collected snapshots after printing.")
+
+    def handle(self, *args, **options):
+        directory = get_instrumentation_settings()['DIR']
+        summary = {}
+        for url_name, histograms in sorted(load_snapshots(directory).items()):
+            summary[url_name] = {'requests': histograms['wall_ms'].count}
+            for metric, histogram in histograms.items():
+                for pct in PERCENTILES:
+                    summary[url_name][f'{metric}_p{pct}'] = histogram.percentile(pct)
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        elif not summary:
+            self.stdout.write(f"No request metrics in {directory}.")
+        else:
+            self.stdout.write(
+                f"{'endpoint':<32}{'requests':>10}{'wall p50/p95/p99 ms':>28}{'db p95 ms':>12}{'queries p95':>13}"
+            )
+            for url_name, row in summary.items():
+                wall = '/'.join(str(row[f'wall_ms_p{pct}']) for pct in PERCENTILES)
+                self.stdout.write(
+                    f"{url_name:<32}{row['requests']:>10}{wall:>28}{row['db_ms_p95']:>12}{row['queries_p95']:>13}"
+                )
+
+        if options['reset']:
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                os.remove(path)
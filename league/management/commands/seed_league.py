@@ -0,0 +1,157 @@
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from account.models import User
+from common.constants import MAX_TEAM_PLAYERS
+from common.utils import explicit_timestamps
+from league.models import Team, Player, Transaction
+
+# Squad template, 2 GK / 7 DEF / 7 MID / 4 ATT; smaller squads take its head and stay balanced
+SQUAD_POSITIONS = [
+    'GK', 'DEF', 'MID', 'ATT', 'DEF', 'MID', 'DEF', 'MID', 'ATT', 'DEF',
+    'MID', 'GK', 'DEF', 'MID', 'ATT', 'DEF', 'MID', 'ATT', 'DEF', 'MID',
+]
+HISTORY_DAYS = 365
+
+
+def seed_chunk(job):
+    """
+    Create the users `job['start']` to `job['stop']` with their teams, players and share of the
+    transactions, in one database transaction. The random stream depends only on the seed and the
+    chunk's first user, so a chunk generates the same rows whichever worker runs it.
+    """
+    options = job['options']
+    rng = random.Random(f"{options['seed']}:{job['start']}")
+    batch_size, prefix = options['batch_size'], options['email_prefix']
+    players_per_team = options['players_per_team']
+    now = timezone.now()
+    history_start = now - timedelta(days=HISTORY_DAYS)
+
+    with explicit_timestamps(Team, Player, Transaction), transaction.atomic():
+        users = User.objects.bulk_create([
+            User(email=f'{prefix}{index}@seed.local', first_name='Seed', last_name=f'User {index}',
+                 password=options['password_hash'])
+            for index in range(job['start'], job['stop'])
+        ], batch_size=batch_size)
+
+        squads = []
+        for user in users:
+            created_at = history_start + timedelta(seconds=rng.randint(0, 86400 * 30))
+            squad = []
+            for position in SQUAD_POSITIONS[:players_per_team]:
+                value = Decimal(rng.randint(500, 3000) * 1000)
+                listed = rng.random() < options['listed']
+                squad.append(Player(
+                    name=f'Player {user.id}.{len(squad)}', position=position, value=value, for_sale=listed,
+                    sale_price=Decimal(round(float(value) * rng.uniform(0.8, 1.5), -3)) if listed else None,
+                    created_at=created_at,
+                    updated_at=history_start + timedelta(seconds=rng.randint(86400 * 30, 86400 * HISTORY_DAYS)),
+                ))
+            squads.append(squad)
+
+        # bulk_create skips the Player signals, so the squad value is set up front
+        teams = Team.objects.bulk_create([
+            Team(user=user, name=f'Team {user.email.split("@")[0]}', slogan='Seeded',
+                 total_value=sum(player.value for player in squad),
+                 created_at=squad[0].created_at if squad else now, updated_at=now)
+            for user, squad in zip(users, squads)
+        ], batch_size=batch_size)
+        for team, squad in zip(teams, squads):
+            for player in squad:
+                player.team = team
+        players = Player.objects.bulk_create([player for squad in squads for player in squad], batch_size=batch_size)
+
+        # Finished transfers between teams of the chunk; the squads are left as they are
+        transactions = []
+        if len(teams) > 1 and players_per_team:
+            for _ in range(job['transactions']):
+                seller, buyer = rng.sample(range(len(teams)), 2)
+                player = rng.choice(squads[seller])
+                transactions.append(Transaction(
+                    player=player, seller_team=teams[seller], buyer_team=teams[buyer], inactive=True,
+                    transfer_amount=Decimal(round(float(player.value) * rng.uniform(0.8, 1.5), -3)),
+                    created_at=history_start + timedelta(seconds=rng.randint(86400 * 30, 86400 * HISTORY_DAYS)),
+                ))
+            Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+
+    return len(users), len(players), len(transactions)
+
+
+def seed_chunk_in_worker(job):
+    # Forked workers must not share the parent's database connection
+    try:
+        return seed_chunk(job)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Seed users, teams, players, market listings and transactions with bulk inserts, for benchmarks and staging."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Users to create, each with a team.")
+        parser.add_argument('--players-per-team', type=int, default=MAX_TEAM_PLAYERS)
+        parser.add_argument('--listed', type=float, default=0.1, help="Share of players listed for sale.")
+        parser.add_argument('--transactions', type=int, default=0, help="Historical transactions to create.")
+        parser.add_argument('--password', default='Seed@1234', help="Password of every seeded user.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Users per database transaction.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT.")
+        parser.add_argument('--workers', type=int, default=1, help="Processes inserting chunks in parallel.")
+        parser.add_argument('--email-prefix', default='seed', help="Users get <prefix><n>@seed.local emails.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        users_count, chunk_size = options['users'], max(1, options['chunk_size'])
+        if not 0 <= options['listed'] <= 1:
+            raise CommandError("--listed must be between 0 and 1.")
+        workers = max(1, options['workers'])
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write("SQLite allows a single writer, seeding with one worker.")
+            workers = 1
+
+        first_index = User.objects.filter(
+            email__startswith=options['email_prefix'], email__endswith='@seed.local'
+        ).count()
+        chunk_options = {
+            'seed': options['seed'],
+            'email_prefix': options['email_prefix'],
+            'batch_size': options['batch_size'],
+            'players_per_team': max(0, min(options['players_per_team'], MAX_TEAM_PLAYERS)),
+            'listed': options['listed'],
+            # Hashed once; hashing per user would dominate the run
+            'password_hash': make_password(options['password']),
+        }
+        # Transfers happen between teams of a chunk, so a trailing single-user chunk joins the previous one
+        bounds = list(range(0, users_count, chunk_size)) + [users_count]
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] == 1:
+            del bounds[-2]
+        jobs = []
+        for offset, end in zip(bounds, bounds[1:]):
+            size = end - offset
+            # Each chunk gets the transactions of its share of the users, rounded so the total adds up
+            transactions = (options['transactions'] * (offset + size) // users_count
+                            - options['transactions'] * offset // users_count)
+            jobs.append({'start': first_index + offset, 'stop': first_index + offset + size,
+                         'transactions': transactions, 'options': chunk_options})
+
+        if workers > 1:
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.map(seed_chunk_in_worker, jobs, chunksize=1)
+        else:
+            results = [seed_chunk(job) for job in jobs]
+
+        users, players, transactions = (sum(counts) for counts in zip(*results)) if results else (0, 0, 0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {users} users and teams, {players} players and {transactions} transactions "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('for_sale', True)), fields=['sale_price', 'id'], name='player_for_sale_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('for_sale', True)), fields=['value', 'id'], name='player_for_sale_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('for_sale', True)), fields=['position', '-updated_at', '-id'], name='player_position_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('for_sale', True)), fields=['position', 'sale_price', 'id'], name='player_position_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('for_sale', True)), fields=['position', 'value', 'id'], name='player_position_value_idx'),
+        ),
+    ]
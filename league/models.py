@@ -1,5 +1,39 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+
+
+class TeamQuerySet(models.QuerySet):
+    # `related` narrows the joins to what the serializer renders (see SparseFieldsMixin.select_related_paths)
+    def for_listing(self, related=('user',)):
+        return self.select_related(*related) if related else self
+
+
+class PlayerQuerySet(models.QuerySet):
+    def with_team(self, related=('team__user',)):
+        return self.select_related(*related) if related else self
+
+    def on_market(self, positions=(), min_price=None, max_price=None, min_value=None, max_value=None,
+                  exclude_team_id=None):
+        queryset = self.filter(for_sale=True)
+        if positions:
+            queryset = queryset.filter(position__in=positions)
+        if min_price is not None:
+            queryset = queryset.filter(sale_price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(sale_price__lte=max_price)
+        if min_value is not None:
+            queryset = queryset.filter(value__gte=min_value)
+        if max_value is not None:
+            queryset = queryset.filter(value__lte=max_value)
+        if exclude_team_id is not None:
+            queryset = queryset.exclude(team_id=exclude_team_id)
+        return queryset
+
+
+class TransactionQuerySet(models.QuerySet):
+    def with_teams(self, related=('player', 'seller_team__user', 'buyer_team__user')):
+        return self.select_related(*related) if related else self
 
 
 class Team(models.Model):
@@ -7,12 +41,20 @@ class Team(models.Model):
     name = models.CharField(max_length=100)
     slogan = models.CharField(max_length=255)
     capital = models.DecimalField(max_digits=10, decimal_places=2, default=5000000.00)
+    # Sum of players' value, kept in sync on every player mutation (see league.signals)
+    total_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    @property
-    def total_value(self):
-        return sum(player.value for player in self.players.all())
+    objects = TeamQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Team listing: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='team_created_idx'),
+            # Sync: WHERE (updated_at, id) > (...) ORDER BY updated_at, id
+            models.Index(fields=['updated_at', 'id'], name='team_updated_idx'),
+        ]
 
 
 class Player(models.Model):
@@ -32,11 +74,65 @@ class Player(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PlayerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Player listing: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='player_created_idx'),
+            # Sync: WHERE (updated_at, id) > (...) ORDER BY updated_at, id
+            models.Index(fields=['updated_at', 'id'], name='player_updated_idx'),
+            # Transfer market: WHERE for_sale ORDER BY updated_at DESC, id DESC, only covering listed players
+            models.Index(fields=['-updated_at', '-id'], condition=Q(for_sale=True), name='player_for_sale_updated_idx'),
+            # Market price/value ranges and sorts, scanned in either direction
+            models.Index(fields=['sale_price', 'id'], condition=Q(for_sale=True), name='player_for_sale_price_idx'),
+            models.Index(fields=['value', 'id'], condition=Q(for_sale=True), name='player_for_sale_value_idx'),
+            # The same with a position filter
+            models.Index(
+                fields=['position', '-updated_at', '-id'], condition=Q(for_sale=True), name='player_position_updated_idx'
+            ),
+            models.Index(
+                fields=['position', 'sale_price', 'id'], condition=Q(for_sale=True), name='player_position_price_idx'
+            ),
+            models.Index(
+                fields=['position', 'value', 'id'], condition=Q(for_sale=True), name='player_position_value_idx'
+            ),
+        ]
+
 
 class Transaction(models.Model):
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
-    seller_team = models.ForeignKey(Team, related_name='sales', on_delete=models.CASCADE)
-    buyer_team = models.ForeignKey(Team, related_name='purchases', on_delete=models.CASCADE, null=True, blank=True)
+    # Indexed by the (team, created_at, id) composites in Meta instead of plain FK indexes
+    seller_team = models.ForeignKey(Team, related_name='sales', on_delete=models.CASCADE, db_index=False)
+    buyer_team = models.ForeignKey(Team, related_name='purchases', on_delete=models.CASCADE, null=True, blank=True,
+                                   db_index=False)
     transfer_amount = models.DecimalField(max_digits=10, decimal_places=2)
     inactive = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Transaction history: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='transaction_created_idx'),
+            # My transactions: WHERE buyer_team = x OR seller_team = x ORDER BY created_at DESC, id DESC
+            models.Index(fields=['buyer_team', '-created_at', '-id'], name='transaction_buyer_idx'),
+            models.Index(fields=['seller_team', '-created_at', '-id'], name='transaction_seller_idx'),
+        ]
+
+
+class Tombstone(models.Model):
+    """Id of a deleted team, player or transaction, so syncing clients can drop their copy (see league.sync)."""
+    TEAM, PLAYER, TRANSACTION = 'team', 'player', 'transaction'
+    MODEL_CHOICES = [(TEAM, 'Team'), (PLAYER, 'Player'), (TRANSACTION, 'Transaction')]
+
+    model = models.CharField(max_length=11, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Sync: WHERE (deleted_at, id) > (...) ORDER BY deleted_at, id
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
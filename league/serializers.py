@@ -1,25 +1,25 @@
 from rest_framework import serializers
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
 from account.serializers import ProfileSerializer
-from common.constants import POSITION_CHOICES
+from common.constants import POSITION_CHOICES, MAX_TEAM_PLAYERS
+from common.instrumentation import TimedSerializerMixin
+from common.serializers import SparseFieldsMixin
 from league.models import Team, Player, Transaction
+from league.sync import decode_watermark
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     owner = ProfileSerializer(source='user', read_only=True)
     total_value = serializers.SerializerMethodField()
 
     class Meta:
         model = Team
         fields = ['id', 'owner', 'name', 'slogan', 'capital', 'total_value', 'created_at', 'updated_at']
-        read_only_fields = ['user', 'capital', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'capital', 'total_value', 'created_at', 'updated_at']
 
     def get_total_value(self, obj):
-        team_value = 0
-        for player in obj.players.all():
-            team_value += player.value
-        return team_value
+        return obj.total_value
 
     def create(self, validated_data):
         try:
@@ -36,11 +36,12 @@ class TeamSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        # Only write edited columns so capital and total_value maintained elsewhere are never overwritten
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         return instance
 
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     team = TeamSerializer(read_only=True)
     display_position = serializers.SerializerMethodField()
 
@@ -55,19 +56,77 @@ class PlayerSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         request = self.context.get("request")
-        player = Player.objects.create(
-            name=validated_data['name'],
-            position=validated_data['position'],
-            team=request.user.team
-        )
+        # Team value is updated by the post_save signal, inside the same transaction as the insert
+        with transaction.atomic():
+            player = Player.objects.create(
+                name=validated_data['name'],
+                position=validated_data['position'],
+                team=request.user.team
+            )
         return player
 
 
+class BulkPlayerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Player
+        fields = ['name', 'position']
+
+
 class PlayerTransactionSerializer(serializers.Serializer):
     price = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
 
 
-class TransactionsHistorySerializer(serializers.ModelSerializer):
+class PlayerPurchaseSerializer(serializers.Serializer):
+    player_id = serializers.IntegerField(required=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
+
+
+class BatchTransactionSerializer(serializers.Serializer):
+    players = PlayerPurchaseSerializer(many=True, allow_empty=False, max_length=MAX_TEAM_PLAYERS)
+    all_or_nothing = serializers.BooleanField(default=True)
+
+    def validate_players(self, value):
+        player_ids = [purchase['player_id'] for purchase in value]
+        if len(set(player_ids)) != len(player_ids):
+            raise serializers.ValidationError("A player can only be bought once per request.")
+        return value
+
+
+class MarketFilterSerializer(serializers.Serializer):
+    # Keyset pagination ordering of every sort option, each backed by a partial index on listed players
+    SORT_ORDERINGS = {
+        'recent': ('-updated_at', '-id'),
+        'price': ('sale_price', 'id'),
+        '-price': ('-sale_price', '-id'),
+        'value': ('value', 'id'),
+        '-value': ('-value', '-id'),
+    }
+
+    position = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    min_value = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_value = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    exclude_my_team = serializers.BooleanField(default=False)
+    sort = serializers.ChoiceField(choices=list(SORT_ORDERINGS), default='recent')
+
+    def validate_position(self, value):
+        # Comma separated, e.g. position=DEF,MID
+        positions = [position.strip().upper() for position in value.split(',') if position.strip()]
+        invalid = [position for position in positions if position not in POSITION_CHOICES]
+        if invalid:
+            raise serializers.ValidationError(f"Invalid position(s): {', '.join(invalid)}.")
+        return positions
+
+    def validate(self, attrs):
+        for field in ['price', 'value']:
+            minimum, maximum = attrs.get(f'min_{field}'), attrs.get(f'max_{field}')
+            if minimum is not None and maximum is not None and minimum > maximum:
+                raise serializers.ValidationError({f'min_{field}': f"Must not be greater than max_{field}."})
+        return attrs
+
+
+class TransactionsHistorySerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     player_name = serializers.CharField(source='player.name')
     seller_team = TeamSerializer(read_only=True)
     buyer_team = TeamSerializer(read_only=True)
@@ -78,21 +137,64 @@ class TransactionsHistorySerializer(serializers.ModelSerializer):
                   'created_at']
 
 
-class MyTransactionsHistorySerializer(serializers.ModelSerializer):
+class TransactionExportSerializer(serializers.Serializer):
+    # Not `format`, which DRF reserves for picking a renderer
+    export_format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    since = serializers.DateTimeField(required=False)
+
+
+class MyTransactionsHistorySerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     my_team_role = serializers.SerializerMethodField()
     player_name = serializers.CharField(source='player.name')
     opposite_team = serializers.SerializerMethodField()
 
+    expandable_methods = {'opposite_team': (TeamSerializer, ['seller_team', 'buyer_team'])}
+
     def get_my_team_role(self, obj):
         login_user = self.context.get('request').user
-        return "Seller" if login_user.team == obj.seller_team else "Buyer"
+        return "Seller" if login_user.team.id == obj.seller_team_id else "Buyer"
 
     def get_opposite_team(self, obj):
         login_user = self.context.get('request').user
-        opposite_team = obj.buyer_team if login_user.team == obj.seller_team else obj.seller_team
-        return TeamSerializer(opposite_team).data
+        if login_user.team.id == obj.seller_team_id:
+            opposite_team_id, opposite_team_field = obj.buyer_team_id, 'buyer_team'
+        else:
+            opposite_team_id, opposite_team_field = obj.seller_team_id, 'seller_team'
+        if not self.is_expanded('opposite_team'):
+            return opposite_team_id
+        return self.serialize_method_field('opposite_team', getattr(obj, opposite_team_field))
 
     class Meta:
         model = Transaction
         fields = ['id', 'my_team_role', 'player', 'player_name', 'opposite_team', 'transfer_amount', 'inactive',
                   'created_at']
+
+
+class SyncSerializer(serializers.Serializer):
+    since = serializers.CharField(required=False, help_text="Watermark returned by the previous sync.")
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+
+    def validate_since(self, value):
+        try:
+            return decode_watermark(value)
+        except ValueError as err:
+            raise serializers.ValidationError(str(err))
+
+
+# Flat rows for sync clients: related objects are sent as ids, each of them synced on its own
+class TeamSyncSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Team
+        fields = ['id', 'user', 'name', 'slogan', 'capital', 'total_value', 'created_at', 'updated_at']
+
+
+class PlayerSyncSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Player
+        fields = ['id', 'team', 'name', 'position', 'value', 'for_sale', 'sale_price', 'created_at', 'updated_at']
+
+
+class TransactionSyncSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Transaction
+        fields = ['id', 'player', 'seller_team', 'buyer_team', 'transfer_amount', 'inactive', 'created_at']
@@ -0,0 +1,276 @@
+import random
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum, Subquery, OuterRef, Case, When, Value, DecimalField
+from django.utils import timezone
+
+from common.cache import invalidate_on_commit, TEAMS, PLAYERS, TRANSACTIONS
+from common.constants import MAX_TEAM_PLAYERS
+from league.events import SOLD, publish_on_commit
+from league.models import Team, Player, Transaction
+
+
+class LeagueError(Exception):
+    def __init__(self, message, custom_code=0, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.custom_code = custom_code
+        self.errors = errors
+
+
+class TransferError(LeagueError):
+    pass
+
+
+class SquadError(LeagueError):
+    pass
+
+
+def increase_player_value(value):
+    # Calculate a random increment between 1% and 10%
+    random_increment = random.uniform(0.01, 0.10)
+    return round(value * Decimal(1 + random_increment), 2)  # Round to 2 decimal places
+
+
+def check_listing(player, price, buyer_team_id):
+    """Return the TransferError that stops `buyer_team_id` from buying `player` at `price`, if any."""
+    # Check player is listed for sale
+    if not player.for_sale:
+        return TransferError("Player is not listed for sale.", 1501)
+
+    # Check buyer's given price matches the players sale price
+    if price != player.sale_price:
+        return TransferError("Price must match the player's listed sale price.", 1502)
+
+    # Check buyer and seller is not same
+    if player.team_id == buyer_team_id:
+        return TransferError("You can't buy your own player.", 1503)
+    return None
+
+
+def publish_sold_on_commit(player_transaction):
+    publish_on_commit(
+        SOLD, player_id=player_transaction.player_id, seller_team_id=player_transaction.seller_team_id,
+        buyer_team_id=player_transaction.buyer_team_id, price=player_transaction.transfer_amount,
+        transaction_id=player_transaction.id
+    )
+
+
+def buy_player(buyer_team_id, player_id, price):
+    """
+    Transfer a listed player to the buyer's team and record the transaction.
+
+    Rows are locked in a fixed order (the player, then both teams by id) so concurrent buys of the
+    same player or by the same team serialize instead of overwriting each other. Capital and squad
+    values are changed with F() expressions, and every UPDATE re-checks the condition it relies on,
+    so a stale read can never double-sell a player or overdraw a team.
+    """
+    with transaction.atomic():
+        player = Player.objects.select_for_update().get(id=player_id)
+
+        error = check_listing(player, price, buyer_team_id)
+        if error:
+            raise error
+        seller_team_id = player.team_id
+
+        teams = {
+            team.id: team
+            for team in Team.objects.select_for_update().filter(
+                id__in=[buyer_team_id, seller_team_id]
+            ).order_by('id')
+        }
+
+        # Check buyer team's capital is sufficient to buy the player
+        if teams[buyer_team_id].capital < price:
+            raise TransferError("Your team's capital is insufficient to but this player.", 1504)
+
+        now = timezone.now()
+        new_value = increase_player_value(player.value)
+
+        # Transfer player to buyer's team and mark it as not for sale anymore
+        transferred = Player.objects.filter(
+            id=player.id, team_id=seller_team_id, for_sale=True, sale_price=price
+        ).update(team_id=buyer_team_id, for_sale=False, sale_price=None, value=new_value, updated_at=now)
+        if not transferred:
+            raise TransferError("Player is not listed for sale.", 1501)
+
+        # Deduct the price from buyer's team capital
+        charged = Team.objects.filter(id=buyer_team_id, capital__gte=price).update(
+            capital=F('capital') - price, total_value=F('total_value') + new_value, updated_at=now
+        )
+        if not charged:
+            raise TransferError("Your team's capital is insufficient to but this player.", 1504)
+
+        # Add the price to seller's team capital
+        Team.objects.filter(id=seller_team_id).update(
+            capital=F('capital') + price, total_value=F('total_value') - player.value, updated_at=now
+        )
+
+        # Cached listings embed the player, both teams and the transaction history
+        invalidate_on_commit(PLAYERS, TEAMS, TRANSACTIONS)
+
+        # Record the transaction
+        player_transaction = Transaction.objects.create(
+            buyer_team_id=buyer_team_id,
+            seller_team_id=seller_team_id,
+            player_id=player.id,
+            transfer_amount=price,
+            inactive=True
+        )
+        publish_sold_on_commit(player_transaction)
+        return player_transaction
+
+
+def add_players(team_id, players_data):
+    """
+    Add several players to a team with one multi-row INSERT.
+
+    The team row is locked while the squad size is checked, so concurrent additions cannot push a
+    team past MAX_TEAM_PLAYERS. Returns the ids of the created players.
+    """
+    with transaction.atomic():
+        # Lock the team so concurrent additions count the squad one at a time
+        Team.objects.select_for_update().only('id').get(id=team_id)
+        players_count = Player.objects.filter(team_id=team_id).count()
+        if players_count + len(players_data) > MAX_TEAM_PLAYERS:
+            raise SquadError(
+                f"You have already {players_count} players in your team. "
+                f"Can't add {len(players_data)} more, a team has at most {MAX_TEAM_PLAYERS} players."
+            )
+
+        players = Player.objects.bulk_create([
+            Player(team_id=team_id, name=player['name'], position=player['position']) for player in players_data
+        ])
+
+        # bulk_create skips the post_save signal, so refresh the stored squad value in the same transaction
+        squad_value = Player.objects.filter(team_id=OuterRef('id')).values('team_id').annotate(
+            value=Sum('value')
+        ).values('value')
+        Team.objects.filter(id=team_id).update(total_value=Subquery(squad_value), updated_at=timezone.now())
+        invalidate_on_commit(PLAYERS, TEAMS)
+    return [player.id for player in players]
+
+
+def _amount_by_team(amounts):
+    # CASE expression mapping each team id to its amount, for a single UPDATE across several teams
+    return Case(
+        *[When(id=team_id, then=Value(amount)) for team_id, amount in amounts.items()],
+        default=Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def buy_players(buyer_team_id, purchases, all_or_nothing=True):
+    """
+    Buy several listed players for one team in a single transaction.
+
+    `purchases` is a list of (player_id, price) pairs. All players are locked up front (by id), then
+    the buyer and every seller team (by id), the same order `buy_player` uses. The combined price is
+    checked against the buyer's capital and the new players against the squad limit before anything
+    is written. Transfers, capital and squad values are then applied with one UPDATE per table and the
+    transactions with one INSERT.
+
+    With `all_or_nothing` any rejected purchase aborts the batch; otherwise purchases are accepted in
+    the given order while they fit and the rejected ones are reported. Returns (transactions, failures)
+    where failures is a list of {'player_id', 'message', 'custom_code'}.
+    """
+    failures = []
+
+    def reject(player_id, error):
+        failures.append({'player_id': player_id, 'message': error.message, 'custom_code': error.custom_code})
+
+    with transaction.atomic():
+        players = {
+            player.id: player
+            for player in Player.objects.select_for_update().filter(
+                id__in=[player_id for player_id, _ in purchases]
+            ).order_by('id')
+        }
+        accepted = []
+        for player_id, price in purchases:
+            player = players.get(player_id)
+            error = check_listing(player, price, buyer_team_id) if player else TransferError("Player not found.", 1505)
+            if error:
+                reject(player_id, error)
+            else:
+                accepted.append((player, price))
+
+        teams = {
+            team.id: team
+            for team in Team.objects.select_for_update().filter(
+                id__in={buyer_team_id, *(player.team_id for player, _ in accepted)}
+            ).order_by('id')
+        }
+        buyer_team = teams[buyer_team_id]
+
+        # Check the combined price and squad size before writing anything
+        if all_or_nothing and not failures:
+            if sum(price for _, price in accepted) > buyer_team.capital:
+                reject(None, TransferError("Your team's capital is insufficient to buy these players.", 1504))
+            elif buyer_team.players.count() + len(accepted) > MAX_TEAM_PLAYERS:
+                reject(None, TransferError(f"A team can't have more than {MAX_TEAM_PLAYERS} players.", 1506))
+        elif not all_or_nothing:
+            capital, squad_size, affordable = buyer_team.capital, buyer_team.players.count(), []
+            for player, price in accepted:
+                if price > capital:
+                    reject(player.id, TransferError("Your team's capital is insufficient to buy this player.", 1504))
+                elif squad_size >= MAX_TEAM_PLAYERS:
+                    reject(player.id, TransferError(f"A team can't have more than {MAX_TEAM_PLAYERS} players.", 1506))
+                else:
+                    capital, squad_size = capital - price, squad_size + 1
+                    affordable.append((player, price))
+            accepted = affordable
+
+        if (all_or_nothing and failures) or not accepted:
+            raise TransferError("No player is bought.", 1507, errors=failures)
+
+        now = timezone.now()
+        new_values = {player.id: increase_player_value(player.value) for player, _ in accepted}
+        total_price = sum(price for _, price in accepted)
+        seller_prices, seller_values = {}, {}
+        for player, price in accepted:
+            seller_prices[player.team_id] = seller_prices.get(player.team_id, 0) + price
+            seller_values[player.team_id] = seller_values.get(player.team_id, 0) + player.value
+
+        # Transfer all players, re-checking each listing like buy_player does
+        listed = Q()
+        for player, price in accepted:
+            listed |= Q(id=player.id, team_id=player.team_id, for_sale=True, sale_price=price)
+        transferred = Player.objects.filter(listed).update(
+            team_id=buyer_team_id, for_sale=False, sale_price=None, updated_at=now,
+            value=Case(
+                *[When(id=player_id, then=Value(value)) for player_id, value in new_values.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+        if transferred != len(accepted):
+            raise TransferError("Player is not listed for sale.", 1501)
+
+        charged = Team.objects.filter(id=buyer_team_id, capital__gte=total_price).update(
+            capital=F('capital') - total_price, total_value=F('total_value') + sum(new_values.values()), updated_at=now
+        )
+        if not charged:
+            raise TransferError("Your team's capital is insufficient to buy these players.", 1504)
+
+        Team.objects.filter(id__in=seller_prices).update(
+            capital=F('capital') + _amount_by_team(seller_prices),
+            total_value=F('total_value') - _amount_by_team(seller_values),
+            updated_at=now,
+        )
+
+        invalidate_on_commit(PLAYERS, TEAMS, TRANSACTIONS)
+
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                buyer_team_id=buyer_team_id,
+                seller_team_id=player.team_id,
+                player_id=player.id,
+                transfer_amount=price,
+                inactive=True
+            )
+            for player, price in accepted
+        ])
+        for player_transaction in transactions:
+            publish_sold_on_commit(player_transaction)
+    return transactions, failures
@@ -1,8 +1,10 @@
 from django.core.exceptions import ValidationError
-from django.db.models.signals import pre_delete
+from django.db.models import F
+from django.db.models.signals import pre_delete, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from league.models import Transaction
+from league.models import Transaction, Player, Team, Tombstone
 
 
 # Signal to prevent deletion
@@ -10,3 +12,27 @@ from league.models import Transaction
 def prevent_inactive_transaction_deletion(sender, instance, **kwargs):
     if instance.inactive:
         raise ValidationError("Inactive transfers cannot be deleted.")
+
+
+# Signals to keep the stored team value in sync when a player joins or leaves a squad
+@receiver(post_save, sender=Player)
+def add_player_value_to_team(sender, instance, created, **kwargs):
+    if created:
+        Team.objects.filter(id=instance.team_id).update(
+            total_value=F('total_value') + instance.value, updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Player)
+def subtract_player_value_from_team(sender, instance, **kwargs):
+    Team.objects.filter(id=instance.team_id).update(
+        total_value=F('total_value') - instance.value, updated_at=timezone.now()
+    )
+
+
+# Tombstones of deleted rows, cascades included, for the sync endpoint
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Player)
+@receiver(post_delete, sender=Transaction)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
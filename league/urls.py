@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from league import async_views
 from league.views import TeamViewSet, PlayerViewSet, SetPlayerForSaleAPIView, RemovePlayerFromSaleAPIView, \
-    PlayersForSaleAPIView, BuyPlayerAPIView, TransactionsHistoryAPIView, TransactionHistoryAPIView, \
-    MyTransactionsHistoryAPIView
+    PlayersForSaleAPIView, MarketEventsAPIView, BuyPlayerAPIView, BuyPlayersAPIView, TransactionsHistoryAPIView, \
+    TransactionHistoryAPIView, TransactionsExportAPIView, MyTransactionsHistoryAPIView, SyncAPIView
 
 router = DefaultRouter()
 router.register("team", TeamViewSet, basename="team")
@@ -15,10 +16,25 @@ urlpatterns = [
     path("player/<int:pk>/set-for-sale/", SetPlayerForSaleAPIView.as_view(), name='set-player-for-sale'),
     path("player/<int:pk>/remove-from-sale/", RemovePlayerFromSaleAPIView.as_view(), name='remove-player-from-sale'),
     path("players/for/purchase/", PlayersForSaleAPIView.as_view(), name='players-for-sale'),
+    path("market/events/", MarketEventsAPIView.as_view(), name='market-events'),
     path("player/<int:pk>/buy/", BuyPlayerAPIView.as_view(), name='buy-player'),
+    path("players/buy/", BuyPlayersAPIView.as_view(), name='buy-players'),
 
     # Transaction History Endpoints
     path("transactions/history/", TransactionsHistoryAPIView.as_view(), name='transactions-history/'),
     path("transaction/<int:pk>/history/", TransactionHistoryAPIView.as_view(), name='transaction-history'),
+    path("transactions/export/", TransactionsExportAPIView.as_view(), name='transactions-export'),
     path("my/transactions/", MyTransactionsHistoryAPIView.as_view(), name='my_transactions-history'),
+
+    # Incremental sync of teams, players and transactions
+    path("sync/", SyncAPIView.as_view(), name='league-sync'),
+
+    # Async read endpoints, for ASGI deployments
+    path("async/team/", async_views.team_list, name='async-team-list'),
+    path("async/team/<int:pk>/", async_views.team_detail, name='async-team-detail'),
+    path("async/player/", async_views.player_list, name='async-player-list'),
+    path("async/player/<int:pk>/", async_views.player_detail, name='async-player-detail'),
+    path("async/players/for/purchase/", async_views.players_for_sale, name='async-players-for-sale'),
+    path("async/transactions/history/", async_views.transactions_history, name='async-transactions-history'),
+    path("async/transaction/<int:pk>/history/", async_views.transaction_history, name='async-transaction-history'),
 ]
@@ -1,20 +1,28 @@
-import random
-from decimal import Decimal
-
-from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from rest_framework import status, generics
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied, NotAuthenticated, ValidationError
+from rest_framework.exceptions import PermissionDenied, NotAuthenticated, ValidationError, NotFound
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.viewsets import ModelViewSet
 
-from common.constants import STH_WENT_WRONG_MSG, BAD_REQUEST
+from common.cache import cached_response, conditional_response, invalidate_on_commit, TEAMS, PLAYERS, TRANSACTIONS
+from common.constants import STH_WENT_WRONG_MSG, BAD_REQUEST, MAX_TEAM_PLAYERS
+from common.idempotency import idempotent
 from common.utils import generate_response
+from league.events import LISTED, DELISTED, publish_on_commit, get_market_event_settings, event_stream, \
+    aevent_stream
+from league.exports import transaction_rows, atransaction_rows, stream_csv, stream_ndjson, astream_csv, \
+    astream_ndjson
 from league.models import Team, Player, Transaction
 from league.permissions import TeamOwner, PlayerOwner
 from league.serializers import TeamSerializer, PlayerSerializer, PlayerTransactionSerializer, \
-    TransactionsHistorySerializer, MyTransactionsHistorySerializer
+    TransactionsHistorySerializer, MyTransactionsHistorySerializer, BulkPlayerSerializer, BatchTransactionSerializer, \
+    MarketFilterSerializer, TransactionExportSerializer, SyncSerializer, TeamSyncSerializer, PlayerSyncSerializer, \
+    TransactionSyncSerializer
+from league.services import buy_player, buy_players, add_players, TransferError, SquadError
+from league.sync import changes_since, encode_watermark, SyncError
 
 
 # Create your views here.
@@ -32,6 +40,7 @@ class TeamViewSet(ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(
@@ -39,6 +48,7 @@ class TeamViewSet(ModelViewSet):
             )
             serializer.is_valid(raise_exception=True)
             team = serializer.save(request=request)
+            invalidate_on_commit(TEAMS)
             team_data = self.get_serializer(team).data
             request.logger.info(f"Team is created. Team id: {team.id}")
             return generate_response(
@@ -68,6 +78,7 @@ class TeamViewSet(ModelViewSet):
             serializer = self.get_serializer(team, data=request.data, partial=kwargs.pop('partial', False))
             serializer.is_valid(raise_exception=True)
             team = serializer.save()
+            invalidate_on_commit(TEAMS)
             team_data = self.get_serializer(team).data
             request.logger.info(f"Team is updated. Team id: {team.id}")
             return generate_response(
@@ -101,9 +112,11 @@ class TeamViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @conditional_response(TEAMS)
+    @cached_response(TEAMS)
     def retrieve(self, request, *args, **kwargs):
         try:
-            team = Team.objects.get(id=kwargs.get('pk'))
+            team = Team.objects.for_listing(self.get_serializer().select_related_paths()).get(id=kwargs.get('pk'))
             serializer = self.get_serializer(team)
             request.logger.info("This is an informational message.")
             return generate_response(data=serializer.data)
@@ -121,11 +134,19 @@ class TeamViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @conditional_response(TEAMS)
+    @cached_response(TEAMS)
     def list(self, request, *args, **kwargs):
         try:
-            team = Team.objects.all().order_by('-created_at')
-            serializer = self.get_serializer(team, many=True)
-            return generate_response(data=serializer.data)
+            teams = self.paginate_queryset(Team.objects.for_listing(self.get_serializer().select_related_paths()))
+            serializer = self.get_serializer(teams, many=True)
+            return self.get_paginated_response(serializer.data)
+        except NotFound as err:
+            return generate_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as err:
             request.logger.exception(f"Exception occurred while getting teams. Error: {err}")
             return generate_response(
@@ -140,6 +161,7 @@ class TeamViewSet(ModelViewSet):
             self.check_object_permissions(request, team)
             request.logger.info(f"Team is deleted. Team id: {team.id}")
             self.perform_destroy(team)
+            invalidate_on_commit(TEAMS, PLAYERS, TRANSACTIONS)
             return generate_response(
                 message="Team deleted successfully",
                 status=status.HTTP_204_NO_CONTENT
@@ -172,9 +194,10 @@ class TeamViewSet(ModelViewSet):
         url_name='my-team',
         serializer_class=TeamSerializer
     )
+    @conditional_response(TEAMS, per_user=True)
     def my_team(self, request):
         try:
-            team = Team.objects.get(user=request.user)
+            team = Team.objects.for_listing(self.get_serializer().select_related_paths()).get(user=request.user)
             serializer = self.get_serializer(team)
             return generate_response(data=serializer.data)
         except Team.DoesNotExist:
@@ -206,6 +229,7 @@ class PlayerViewSet(ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(
@@ -218,13 +242,14 @@ class PlayerViewSet(ModelViewSet):
                     success=False,
                     status=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 )
-            if request.user.team.players.count() >= 20:
+            if request.user.team.players.count() >= MAX_TEAM_PLAYERS:
                 return generate_response(
-                    message="You have already 20 players in your team. Can't add more player.",
+                    message=f"You have already {MAX_TEAM_PLAYERS} players in your team. Can't add more player.",
                     success=False,
                     status=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 )
             player = serializer.save(request=request)
+            invalidate_on_commit(PLAYERS, TEAMS)
             player_data = self.get_serializer(player).data
             request.logger.info(f"Player is added in team. Player id: {player.id}")
             return generate_response(
@@ -254,6 +279,7 @@ class PlayerViewSet(ModelViewSet):
             serializer = self.get_serializer(player, data=request.data, partial=kwargs.pop('partial', False))
             serializer.is_valid(raise_exception=True)
             player = serializer.save()
+            invalidate_on_commit(PLAYERS)
             player_data = self.get_serializer(player).data
             request.logger.info(f"Player info is updated")
             return generate_response(
@@ -287,11 +313,19 @@ class PlayerViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @conditional_response(PLAYERS, TEAMS)
+    @cached_response(PLAYERS, TEAMS)
     def list(self, request, *args, **kwargs):
         try:
-            players = Player.objects.all().order_by('-created_at')
+            players = self.paginate_queryset(Player.objects.with_team(self.get_serializer().select_related_paths()))
             serializer = self.get_serializer(players, many=True)
-            return generate_response(data=serializer.data)
+            return self.get_paginated_response(serializer.data)
+        except NotFound as err:
+            return generate_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as err:
             request.logger.exception(f"Exception occurred while getting players. Error: {err}")
             return generate_response(
@@ -300,9 +334,11 @@ class PlayerViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @conditional_response(PLAYERS, TEAMS)
+    @cached_response(PLAYERS, TEAMS)
     def retrieve(self, request, *args, **kwargs):
         try:
-            player = Player.objects.get(id=kwargs.get('pk'))
+            player = Player.objects.with_team(self.get_serializer().select_related_paths()).get(id=kwargs.get('pk'))
             serializer = self.get_serializer(player)
             return generate_response(data=serializer.data)
         except Player.DoesNotExist:
@@ -324,6 +360,7 @@ class PlayerViewSet(ModelViewSet):
             player = Player.objects.get(id=kwargs.get('pk'))
             self.check_object_permissions(request, player)
             self.perform_destroy(player)
+            invalidate_on_commit(PLAYERS, TEAMS, TRANSACTIONS)
             request.logger.info(f"Player is deleted")
             return generate_response(
                 message="Player removed from team successfully.",
@@ -349,6 +386,57 @@ class PlayerViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    # Custom action to add several players to login user team at once
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        url_name='bulk-create',
+        serializer_class=BulkPlayerSerializer
+    )
+    @idempotent
+    def bulk_create(self, request):
+        try:
+            serializer = self.get_serializer(
+                data=request.data, many=True, allow_empty=False, max_length=MAX_TEAM_PLAYERS
+            )
+            serializer.is_valid(raise_exception=True)
+            if not hasattr(request.user, 'team'):
+                return generate_response(
+                    message="You don't have team. Create team first.",
+                    success=False,
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            player_ids = add_players(request.user.team.id, serializer.validated_data)
+            players = Player.objects.with_team().filter(id__in=player_ids).order_by('id')
+            players_data = PlayerSerializer(players, many=True).data
+            request.logger.info(f"{len(player_ids)} players are added in team. Team id: {request.user.team.id}")
+            return generate_response(
+                message="Players are added in your team successfully.",
+                status=status.HTTP_201_CREATED,
+                data=players_data
+            )
+        except ValidationError as validation_error:
+            return generate_response(
+                message=BAD_REQUEST,
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST,
+                errors=validation_error.detail
+            )
+        except SquadError as err:
+            return generate_response(
+                message=err.message,
+                success=False,
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        except Exception as err:
+            request.logger.exception(f"Exception occurred while adding players in bulk. Error: {err}")
+            return generate_response(
+                message=STH_WENT_WRONG_MSG,
+                success=False,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     # Custom action to return login user team players
     @action(
         detail=False,
@@ -357,10 +445,13 @@ class PlayerViewSet(ModelViewSet):
         url_name='my-team-players',
         serializer_class=PlayerSerializer
     )
+    @conditional_response(PLAYERS, TEAMS, per_user=True)
     def my_team_players(self, request):
         try:
             if hasattr(request.user, 'team'):
-                players = Player.objects.filter(team=request.user.team).order_by('-created_at')
+                players = Player.objects.with_team(self.get_serializer().select_related_paths()).filter(
+                    team=request.user.team
+                ).order_by('-created_at')
                 serializer = self.get_serializer(players, many=True)
                 return generate_response(data=serializer.data)
             return generate_response(message="You don't have team.")
@@ -377,6 +468,7 @@ class SetPlayerForSaleAPIView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated, PlayerOwner]
     serializer_class = PlayerTransactionSerializer
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         try:
             serializer = self.serializer_class(request.user, data=request.data)
@@ -386,6 +478,11 @@ class SetPlayerForSaleAPIView(generics.GenericAPIView):
             player.for_sale = True
             player.sale_price = serializer.validated_data['price']
             player.save()
+            invalidate_on_commit(PLAYERS)
+            publish_on_commit(
+                LISTED, player_id=player.id, team_id=player.team_id, name=player.name, position=player.position,
+                value=player.value, price=player.sale_price
+            )
             request.logger.info(f"Player '{kwargs['pk']}' is set for sale")
             return generate_response(message="Player is set for sale.")
         except ValidationError as err:
@@ -425,9 +522,13 @@ class RemovePlayerFromSaleAPIView(generics.GenericAPIView):
         try:
             player = Player.objects.get(id=kwargs.get('pk'))
             self.check_object_permissions(request, player)
+            was_listed = player.for_sale
             player.for_sale = False
             player.sale_price = None
             player.save()
+            invalidate_on_commit(PLAYERS)
+            if was_listed:
+                publish_on_commit(DELISTED, player_id=player.id, team_id=player.team_id)
             request.logger.info(f"Player '{kwargs['pk']}' is removed from sale list")
             return generate_response(message="Player is removed from sale.")
         except Player.DoesNotExist:
@@ -456,12 +557,43 @@ class RemovePlayerFromSaleAPIView(generics.GenericAPIView):
 class PlayersForSaleAPIView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     serializer_class = PlayerSerializer
+    pagination_ordering = ('-updated_at', '-id')
 
+    @conditional_response(PLAYERS, TEAMS, user_params=['exclude_my_team'])
+    @cached_response(PLAYERS, TEAMS, user_params=['exclude_my_team'])
     def get(self, request, *args, **kwargs):
         try:
-            players = Player.objects.filter(for_sale=True).order_by('-updated_at')
+            filters = MarketFilterSerializer(data=request.query_params)
+            filters.is_valid(raise_exception=True)
+            options = filters.validated_data
+            my_team = getattr(request.user, 'team', None) if options['exclude_my_team'] else None
+
+            self.pagination_ordering = MarketFilterSerializer.SORT_ORDERINGS[options['sort']]
+            players = self.paginate_queryset(
+                Player.objects.with_team(self.get_serializer().select_related_paths()).on_market(
+                    positions=options.get('position'),
+                    min_price=options.get('min_price'),
+                    max_price=options.get('max_price'),
+                    min_value=options.get('min_value'),
+                    max_value=options.get('max_value'),
+                    exclude_team_id=my_team.id if my_team else None,
+                )
+            )
             serializer = self.get_serializer(players, many=True)
-            return generate_response(data=serializer.data)
+            return self.get_paginated_response(serializer.data)
+        except ValidationError as err:
+            return generate_response(
+                message=BAD_REQUEST,
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST,
+                errors=err.detail
+            )
+        except NotFound as err:
+            return generate_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as err:
             request.logger.exception(f"Exception occurred while getting players for purchase. Error: {err}")
             return generate_response(
@@ -471,9 +603,41 @@ class PlayersForSaleAPIView(generics.GenericAPIView):
             )
 
 
+class MarketEventsAPIView(generics.GenericAPIView):
+    # Server-Sent Events of the transfer market, see league.events
+    permission_classes = [AllowAny]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The stream writes its own body, so `Accept: text/event-stream` must not end in a 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            last_event_id = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('last_event_id')
+            keepalive = get_market_event_settings()['KEEPALIVE']
+            # Under ASGI the stream waits on the event loop rather than holding a thread per client
+            if isinstance(request._request, ASGIRequest):
+                stream = aevent_stream(last_event_id, keepalive)
+            else:
+                stream = event_stream(last_event_id, keepalive)
+            response = StreamingHttpResponse(stream, content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            request.logger.info(f"Market event stream opened. Last event id: {last_event_id}")
+            return response
+        except Exception as err:
+            request.logger.exception(f"Exception occurred while opening the market event stream. Error: {err}")
+            return generate_response(
+                message=STH_WENT_WRONG_MSG,
+                success=False,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class BuyPlayerAPIView(generics.GenericAPIView):
     serializer_class = PlayerTransactionSerializer
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         try:
             serializer = self.serializer_class(request.user, data=request.data)
@@ -491,81 +655,73 @@ class BuyPlayerAPIView(generics.GenericAPIView):
                     custom_code=1500
                 )
 
-            # Get player from db
-            player = Player.objects.get(id=kwargs.get('pk'))
+            player_transaction = buy_player(buyer.team.id, kwargs.get('pk'), buying_price)
+            request.logger.info(
+                f"Player '{kwargs['pk']}' is transferred. Buyer team: {player_transaction.buyer_team_id}. "
+                f"Seller team: {player_transaction.seller_team_id}"
+            )
+            return generate_response(message="Player bought successfully.")
+        except ValidationError as err:
+            return generate_response(
+                message=BAD_REQUEST,
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST,
+                errors=err.detail
+            )
+        except Player.DoesNotExist:
+            return generate_response(
+                message="Player not found.",
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except TransferError as err:
+            return generate_response(
+                message=err.message,
+                success=False,
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                custom_code=err.custom_code
+            )
+        except Exception as err:
+            request.logger.exception(f"Exception occurred while player transfer. Req: '{request.data}'. Error: {err}")
+            return generate_response(
+                message=STH_WENT_WRONG_MSG,
+                success=False,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-            buyer_team = buyer.team
-            seller_team = player.team
 
-            # Check player is listed for sale
-            if not player.for_sale:
-                return generate_response(
-                    message="Player is not listed for sale.",
-                    success=False,
-                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    custom_code=1501
-                )
+class BuyPlayersAPIView(generics.GenericAPIView):
+    serializer_class = BatchTransactionSerializer
 
-            # Check buyer's given price matches the players sale price
-            if buying_price != player.sale_price:
-                return generate_response(
-                    message="Price must match the player's listed sale price.",
-                    success=False,
-                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    custom_code=1502
-                )
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer_class(data=request.data)
+            serializer.is_valid(raise_exception=True)
 
-            # Check buyer and seller is not same
-            if seller_team == buyer_team:
-                return generate_response(
-                    message="You can't buy your own player.",
-                    success=False,
-                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    custom_code=1503
-                )
+            buyer = request.user
 
-            # Check buyer team's capital is sufficient to buy the player
-            if buyer_team.capital < buying_price:
+            # Check buyer has team or not
+            if not hasattr(buyer, 'team'):
                 return generate_response(
-                    message="Your team's capital is insufficient to but this player.",
+                    message="You don't have team. Kindly create a team first to buy a player.",
                     success=False,
                     status=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    custom_code=1504
-                )
-
-            with transaction.atomic():
-                # Deduct the price from buyer's team capital
-                buyer_team.capital -= buying_price
-                buyer_team.save()
-
-                # Add the price to seller's team capital
-                seller_team.capital += buying_price
-                seller_team.save()
-
-                # Transfer player to buyer's team
-                player.team = buyer_team
-                player.for_sale = False  # Mark player as not for sale anymore
-                player.sale_price = None
-
-                # Calculate a random increment between 1% and 10%
-                random_increment = random.uniform(0.01, 0.10)  # Random number between 0.01 (1%) and 0.10 (10%)
-                new_value = player.value * Decimal(1 + random_increment)  # Increment player value by the random percentage
-                player.value = round(new_value, 2)  # Round to 2 decimal places
-                player.save()
-
-                # Record the transaction
-                request.logger.info(
-                    f"Player '{kwargs['pk']}' is transferred. Buyer team: {buyer_team.id}. Seller team: {seller_team.id}"
-                )
-                Transaction.objects.create(
-                    buyer_team=buyer_team,
-                    seller_team=seller_team,
-                    player=player,
-                    transfer_amount=buying_price,
-                    inactive=True
+                    custom_code=1500
                 )
 
-            return generate_response(message="Player bought successfully.")
+            purchases = [(purchase['player_id'], purchase['price']) for purchase in serializer.validated_data['players']]
+            transactions, failures = buy_players(
+                buyer.team.id, purchases, all_or_nothing=serializer.validated_data['all_or_nothing']
+            )
+            request.logger.info(
+                f"Players {[item.player_id for item in transactions]} are transferred. Buyer team: {buyer.team.id}. "
+                f"Rejected: {[failure['player_id'] for failure in failures]}"
+            )
+            return generate_response(
+                message="Players bought successfully." if not failures else "Some players are bought.",
+                data={'bought': [item.player_id for item in transactions], 'failed': failures}
+            )
         except ValidationError as err:
             return generate_response(
                 message=BAD_REQUEST,
@@ -573,14 +729,16 @@ class BuyPlayerAPIView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
                 errors=err.detail
             )
-        except Player.DoesNotExist:
+        except TransferError as err:
             return generate_response(
-                message="Player not found.",
+                message=err.message,
                 success=False,
-                status=status.HTTP_404_NOT_FOUND
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                custom_code=err.custom_code,
+                errors=err.errors
             )
         except Exception as err:
-            request.logger.exception(f"Exception occurred while player transfer. Req: '{request.data}'. Error: {err}")
+            request.logger.exception(f"Exception occurred while batch transfer. Req: '{request.data}'. Error: {err}")
             return generate_response(
                 message=STH_WENT_WRONG_MSG,
                 success=False,
@@ -592,11 +750,21 @@ class TransactionsHistoryAPIView(generics.GenericAPIView):
     serializer_class = TransactionsHistorySerializer
     permission_classes = [AllowAny]
 
+    @conditional_response(TRANSACTIONS, PLAYERS, TEAMS)
+    @cached_response(TRANSACTIONS, PLAYERS, TEAMS)
     def get(self, request, *args, **kwargs):
         try:
-            transactions = Transaction.objects.all().order_by('-created_at')
-            serializer = self.serializer_class(transactions, many=True)
-            return generate_response(data=serializer.data)
+            transactions = self.paginate_queryset(
+                Transaction.objects.with_teams(self.get_serializer().select_related_paths())
+            )
+            serializer = self.get_serializer(transactions, many=True)
+            return self.get_paginated_response(serializer.data)
+        except NotFound as err:
+            return generate_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as err:
             request.logger.exception(f"Exception occurred while getting transactions. Error: {err}")
             return generate_response(
@@ -610,10 +778,14 @@ class TransactionHistoryAPIView(generics.GenericAPIView):
     serializer_class = TransactionsHistorySerializer
     permission_classes = [AllowAny]
 
+    @conditional_response(TRANSACTIONS, PLAYERS, TEAMS)
+    @cached_response(TRANSACTIONS, PLAYERS, TEAMS)
     def get(self, request, *args, **kwargs):
         try:
-            transaction = Transaction.objects.get(id=kwargs.get('pk'))
-            serializer = self.serializer_class(transaction)
+            transaction = Transaction.objects.with_teams(self.get_serializer().select_related_paths()).get(
+                id=kwargs.get('pk')
+            )
+            serializer = self.get_serializer(transaction)
             return generate_response(data=serializer.data)
         except Transaction.DoesNotExist:
             return generate_response(
@@ -630,18 +802,70 @@ class TransactionHistoryAPIView(generics.GenericAPIView):
             )
 
 
+class TransactionsExportAPIView(generics.GenericAPIView):
+    serializer_class = TransactionExportSerializer
+    # Rows fetched from the database per round trip; memory use stays at about one chunk
+    chunk_size = 2000
+    content_types = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+    streams = {'csv': stream_csv, 'ndjson': stream_ndjson}
+    async_streams = {'csv': astream_csv, 'ndjson': astream_ndjson}
+
+    def perform_content_negotiation(self, request, force=False):
+        # The export writes its own body, so an Accept header such as text/csv must not end in a 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer_class(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            export_format = serializer.validated_data['export_format']
+
+            since = serializer.validated_data.get('since')
+            # Under ASGI a sync body would be read to the end before its first byte is sent
+            if isinstance(request._request, ASGIRequest):
+                stream = self.async_streams[export_format](atransaction_rows(since, chunk_size=self.chunk_size))
+            else:
+                stream = self.streams[export_format](transaction_rows(since, chunk_size=self.chunk_size))
+            response = StreamingHttpResponse(stream, content_type=self.content_types[export_format])
+            response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+            request.logger.info(f"Transactions export started. Format: {export_format}. User id: {request.user.id}")
+            return response
+        except ValidationError as err:
+            return generate_response(
+                message=BAD_REQUEST,
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST,
+                errors=err.detail
+            )
+        except Exception as err:
+            request.logger.exception(f"Exception occurred while exporting transactions. Error: {err}")
+            return generate_response(
+                message=STH_WENT_WRONG_MSG,
+                success=False,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class MyTransactionsHistoryAPIView(generics.GenericAPIView):
     serializer_class = MyTransactionsHistorySerializer
 
     def get(self, request, *args, **kwargs):
         try:
             if hasattr(request.user, 'team'):
-                transactions = Transaction.objects.filter(
-                    Q(buyer_team=request.user.team) | Q(seller_team=request.user.team)
-                ).order_by('-created_at').all()
-                serializer = self.serializer_class(transactions, many=True, context={"request": request})
-                return generate_response(data=serializer.data)
+                transactions = self.paginate_queryset(
+                    Transaction.objects.with_teams(self.get_serializer().select_related_paths()).filter(
+                        Q(buyer_team=request.user.team) | Q(seller_team=request.user.team)
+                    )
+                )
+                serializer = self.get_serializer(transactions, many=True)
+                return self.get_paginated_response(serializer.data)
             return generate_response(message="You have not created team yet.")
+        except NotFound as err:
+            return generate_response(
+                message=err.detail,
+                success=False,
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as err:
             request.logger.exception(
                 f"Exception occurred while getting my transactions. User id: {request.user.id}, Error: {err}"
@@ -651,3 +875,52 @@ class MyTransactionsHistoryAPIView(generics.GenericAPIView):
                 success=False,
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class SyncAPIView(generics.GenericAPIView):
+    permission_classes = [AllowAny]
+    serializer_class = SyncSerializer
+    row_serializers = {
+        'teams': TeamSyncSerializer,
+        'players': PlayerSyncSerializer,
+        'transactions': TransactionSyncSerializer,
+    }
+
+    def get(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer_class(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            positions, issued_at = serializer.validated_data.get('since') or ({}, None)
+            rows, positions, has_more, now = changes_since(positions, issued_at, serializer.validated_data['limit'])
+
+            data = {
+                name: row_serializer(rows[name], many=True).data for name, row_serializer in self.row_serializers.items()
+            }
+            data['deleted'] = {name: [] for name in self.row_serializers}
+            for tombstone in rows['deleted']:
+                data['deleted'][f'{tombstone.model}s'].append(tombstone.object_id)
+            # Keep calling with the new watermark while has_more is true
+            data['watermark'] = encode_watermark(positions, now)
+            data['has_more'] = has_more
+            return generate_response(data=data)
+        except ValidationError as err:
+            return generate_response(
+                message=BAD_REQUEST,
+                success=False,
+                status=status.HTTP_400_BAD_REQUEST,
+                errors=err.detail
+            )
+        except SyncError as err:
+            return generate_response(
+                message=err.message,
+                success=False,
+                status=status.HTTP_410_GONE,
+                custom_code=err.custom_code
+            )
+        except Exception as err:
+            request.logger.exception(f"Exception occurred while syncing league changes. Error: {err}")
+            return generate_response(
+                message=STH_WENT_WRONG_MSG,
+                success=False,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
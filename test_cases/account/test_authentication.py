@@ -0,0 +1,76 @@
+import base64
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from account.serializers import CustomTokenObtainPairSerializer
+from test_cases.fixtures import api_client, auth_client, create_user
+
+
+class TestCachedJWTAuthentication:
+    @pytest.mark.django_db
+    def test_user_is_cached_between_requests(self, auth_client, django_assert_num_queries):
+        client, user = auth_client
+        url = reverse('user-profile')
+        assert client.get(url).status_code == status.HTTP_200_OK
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.data['data']['email'] == user.email
+
+    @pytest.mark.django_db
+    def test_profile_update_invalidates_cached_user(self, auth_client):
+        client, user = auth_client
+        client.get(reverse('user-profile'))
+        response = client.post(
+            reverse('user-profile-update'), {'first_name': 'Updated fn', 'last_name': 'Updated ln'}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get(reverse('user-profile'))
+        assert response.data['data']['first_name'] == 'Updated fn'
+
+    @pytest.mark.django_db
+    def test_deactivated_user_is_rejected(self, auth_client):
+        client, user = auth_client
+        url = reverse('user-profile')
+        assert client.get(url).status_code == status.HTTP_200_OK
+        user.is_active = False
+        user.save()
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.django_db
+    def test_claims_user_for_read_only_endpoint(self, api_client, create_user, django_assert_num_queries):
+        user = create_user()
+        tokens = CustomTokenObtainPairSerializer.get_token(user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with override_settings(USER_CACHE={'CLAIMS_USER_FOR_READS': True}):
+            with django_assert_num_queries(0):
+                response = api_client.get(reverse('user-profile'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data'] == {
+            'id': user.id, 'first_name': user.first_name, 'last_name': user.last_name, 'email': user.email
+        }
+
+
+class TestCachedBasicAuthentication:
+    @pytest.mark.django_db
+    def test_verified_credentials_skip_password_check(self, api_client, create_user, django_assert_num_queries):
+        user = create_user()
+        credentials = base64.b64encode(f'{user.email}:Asdf@1122'.encode()).decode()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+        url = reverse('user-profile')
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+        with django_assert_num_queries(0):
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    @pytest.mark.django_db
+    def test_wrong_password_is_not_served_from_cache(self, api_client, create_user):
+        user = create_user()
+        url = reverse('user-profile')
+        valid = base64.b64encode(f'{user.email}:Asdf@1122'.encode()).decode()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Basic {valid}')
+        api_client.get(url)
+        invalid = base64.b64encode(f'{user.email}:Wrong@1122'.encode()).decode()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Basic {invalid}')
+        assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
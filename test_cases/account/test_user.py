@@ -1,6 +1,10 @@
+from unittest import mock
+
 import pytest
+from django.contrib.auth import hashers
 from django.urls import reverse
 from rest_framework import status
+from account.models import User
 from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
 
 
@@ -18,6 +22,24 @@ class TestUserRegistration:
         response = api_client.post(url, data, format='json')
         assert response.status_code == status.HTTP_201_CREATED
 
+    @pytest.mark.django_db
+    def test_user_registration_hashes_password_once(self, api_client, django_assert_num_queries):
+        url = reverse('user-registration')
+        data = {
+            'email': 'user@gmail.com',
+            'first_name': 'User fn',
+            'last_name': 'User ln',
+            'password': 'Asdf@1122',
+            'confirm_password': 'Asdf@1122'
+        }
+        with mock.patch('django.contrib.auth.base_user.make_password', wraps=hashers.make_password) as make_password:
+            # Email uniqueness check and a single INSERT
+            with django_assert_num_queries(2):
+                response = api_client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert make_password.call_count == 1
+        assert User.objects.get(email='user@gmail.com').check_password('Asdf@1122')
+
     @pytest.mark.django_db
     def test_user_registration_with_invalid_request_body(self, api_client):
         url = reverse('user-registration')
@@ -0,0 +1,102 @@
+import pytest
+from django.db import OperationalError, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from account.models import User
+from common import db_router
+from common.cache import get_cache
+from common.db_router import ReplicaRouter, ReplicaRoutingMiddleware, choose_replica
+from league.models import Player
+
+from test_cases.common.test_instrumentation import server_timing
+from test_cases.fixtures import auth_client, api_client, create_user, create_team, create_player
+
+
+@pytest.fixture
+def replicas(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = {**settings.DATABASE_REPLICAS, 'ALIASES': ['replica1']}
+    monkeypatch.setattr(db_router, '_unavailable_until', {})
+    monkeypatch.setattr(db_router, 'choose_replica', lambda aliases, retry_after: aliases[0])
+
+
+def route(method='get', status=200, **headers):
+    """Send a request through the middleware and report where the view's reads would go."""
+    routes = {}
+
+    def view(request):
+        router = ReplicaRouter()
+        routes['player'] = router.db_for_read(Player)
+        routes['user'] = router.db_for_read(User)
+        routes['write'] = router.db_for_write(Player)
+        with transaction.atomic():
+            routes['atomic'] = router.db_for_read(Player)
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)('/api/players/for/purchase/', **headers)
+    ReplicaRoutingMiddleware(view)(request)
+    return routes
+
+
+# Routed reads need a request outside any transaction, so these tests don't run in one
+class TestReplicaRouter:
+    @pytest.mark.django_db(transaction=True)
+    def test_safe_reads_of_league_data_use_the_replica(self, replicas):
+        assert route() == {'player': 'replica1', 'user': None, 'write': 'default', 'atomic': 'default'}
+        assert route('post')['player'] is None
+        # Outside a request everything reads the primary
+        assert ReplicaRouter().db_for_read(Player) is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_client_is_pinned_to_primary_after_a_write(self, replicas):
+        route('post', status=422, HTTP_AUTHORIZATION='Bearer one')
+        assert route(HTTP_AUTHORIZATION='Bearer one')['player'] == 'replica1'
+
+        route('post', HTTP_AUTHORIZATION='Bearer one')
+        assert route(HTTP_AUTHORIZATION='Bearer one')['player'] is None
+        assert route(HTTP_AUTHORIZATION='Bearer two')['player'] == 'replica1'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pin_survives_a_full_response_cache(self, replicas):
+        route('post', HTTP_AUTHORIZATION='Bearer one')
+        for index in range(1000):
+            get_cache().set(f'league:response:{index}', b'{}')
+        assert route(HTTP_AUTHORIZATION='Bearer one')['player'] is None
+
+    def test_unavailable_replica_falls_back_to_primary(self, monkeypatch):
+        attempts = []
+
+        class DownConnection:
+            def ensure_connection(self):
+                attempts.append(1)
+                raise OperationalError('unable to open database file')
+
+        monkeypatch.setattr(db_router, 'connections', {'replica1': DownConnection()})
+        monkeypatch.setattr(db_router, '_unavailable_until', {})
+        assert choose_replica(['replica1'], retry_after=30) is None
+        # Skipped without another attempt until retry_after has passed
+        assert choose_replica(['replica1'], retry_after=30) is None
+        assert len(attempts) == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_replica_reads_right_after_a_write_are_not_cached(self, settings, monkeypatch, auth_client,
+                                                              create_team, create_player):
+        # The primary stands in for the replica, so reads are routed but see the same rows
+        settings.DATABASE_REPLICAS = {**settings.DATABASE_REPLICAS, 'ALIASES': ['default']}
+        monkeypatch.setattr(db_router, '_unavailable_until', {})
+        client, user = auth_client
+        player = create_player('Player - 1', create_team(user))
+        response = client.post(reverse('set-player-for-sale', args=[player.id]), {'price': 1500000}, format='json')
+        assert response.status_code == 200
+
+        anonymous = APIClient()
+        for _ in range(2):
+            response = anonymous.get(reverse('players-for-sale'))
+            assert len(response.json()['data']) == 1
+            assert server_timing(response)['queries'] > 0
+
+        settings.DATABASE_REPLICAS = {**settings.DATABASE_REPLICAS, 'PIN_SECONDS': 0}
+        anonymous.get(reverse('players-for-sale'))
+        assert server_timing(anonymous.get(reverse('players-for-sale')))['queries'] == 0
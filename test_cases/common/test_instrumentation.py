@@ -0,0 +1,86 @@
+import json
+import logging
+import re
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from common.instrumentation import Histogram, MetricsStore, load_snapshots
+
+from test_cases.fixtures import api_client, create_user, create_team, create_player
+
+
+def server_timing(response):
+    header = response['Server-Timing']
+    return {
+        'queries': int(re.search(r'desc="(\d+) queries"', header).group(1)),
+        **{name: float(value) for name, value in re.findall(r'(\w+);dur=([\d.]+)', header)},
+    }
+
+
+class TestInstrumentationMiddleware:
+    @pytest.mark.django_db
+    def test_server_timing_header(self, api_client, create_user, create_team, create_player):
+        team = create_team(create_user())
+        create_player('Player - 1', team, 'GK')
+        timing = server_timing(api_client.get(reverse('player-list')))
+        assert timing['queries'] == 1
+        assert timing['total'] >= timing['db'] and timing['serialize'] > 0
+
+        # A cache hit runs no queries and no serializer
+        timing = server_timing(api_client.get(reverse('player-list')))
+        assert timing['queries'] == 0 and timing['serialize'] == 0
+
+    @pytest.mark.django_db
+    def test_structured_log_and_query_budget(self, api_client, create_user, create_team, settings, caplog):
+        settings.REQUEST_INSTRUMENTATION = {**settings.REQUEST_INSTRUMENTATION, 'QUERY_BUDGET': 0}
+        create_team(create_user())
+        with caplog.at_level(logging.INFO, logger='request_metrics'):
+            api_client.get(reverse('team-list'))
+        record = next(record for record in caplog.records if record.name == 'request_metrics')
+        line = json.loads(record.getMessage())
+        assert record.levelno == logging.WARNING
+        assert line['url_name'] == 'team-list' and line['queries'] == 1 and line['over_query_budget'] is True
+
+
+class TestMetricsStore:
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        assert histogram.count == 100
+        assert 50 <= histogram.percentile(50) <= 50 * 1.19
+        assert 99 <= histogram.percentile(99) <= 99 * 1.19
+
+    def test_snapshots_merge_across_processes(self, tmp_path, monkeypatch):
+        for pid, wall_ms in [(101, 10), (102, 1000)]:
+            monkeypatch.setattr('os.getpid', lambda: pid)
+            store = MetricsStore(tmp_path)
+            store.record('team-list', {'wall_ms': wall_ms, 'db_ms': 1, 'serialize_ms': 1, 'queries': 1})
+            store.flush()
+
+        merged = load_snapshots(tmp_path)
+        assert merged['team-list']['wall_ms'].count == 2
+        assert merged['team-list']['wall_ms'].percentile(50) < 12 < 1000 <= merged['team-list']['wall_ms'].percentile(99)
+
+    def test_window_rotation(self, tmp_path):
+        store = MetricsStore(tmp_path, window=0)
+        sample = {'wall_ms': 5, 'db_ms': 1, 'serialize_ms': 1, 'queries': 2}
+        for _ in range(3):
+            store.record('team-list', sample)
+        # Only the current and the previous window are kept
+        assert sum(store.snapshot()['team-list']['queries'].values()) == 2
+
+    def test_dump_command(self, tmp_path, settings, capsys):
+        settings.REQUEST_INSTRUMENTATION = {**settings.REQUEST_INSTRUMENTATION, 'DIR': tmp_path}
+        store = MetricsStore(tmp_path)
+        for wall_ms in range(1, 21):
+            store.record('players-for-sale', {'wall_ms': wall_ms, 'db_ms': 1, 'serialize_ms': 1, 'queries': 3})
+        store.flush()
+
+        call_command('request_metrics', '--json', '--reset')
+        summary = json.loads(capsys.readouterr().out)
+        assert summary['players-for-sale']['requests'] == 20
+        assert summary['players-for-sale']['queries_p95'] >= 3
+        assert not list(tmp_path.glob('*.json'))
@@ -0,0 +1,57 @@
+import logging
+import threading
+
+from common.logging_middleware import RequestLogPipeline
+
+
+class TestRequestLogPipeline:
+    def test_records_are_written_to_endpoint_file_on_stop(self, tmp_path):
+        pipeline = RequestLogPipeline(directory=tmp_path)
+        logger = pipeline.get_logger('pipeline-test-endpoint')
+        for index in range(100):
+            logger.info(f"Message {index}")
+        pipeline.stop()
+
+        lines = (tmp_path / 'pipeline-test-endpoint.log').read_text().splitlines()
+        assert len(lines) == 100
+        assert lines[0].startswith('INFO ') and lines[-1].endswith('Message 99')
+
+    def test_exceptions_are_formatted(self, tmp_path):
+        pipeline = RequestLogPipeline(directory=tmp_path)
+        logger = pipeline.get_logger('pipeline-test-exception')
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+        pipeline.stop()
+
+        content = (tmp_path / 'pipeline-test-exception.log').read_text()
+        assert 'ERROR' in content and 'ValueError: boom' in content
+
+    def test_full_queue_drops_records_without_blocking(self, tmp_path):
+        pipeline = RequestLogPipeline(directory=tmp_path, queue_size=5, policy='drop')
+        release = threading.Event()
+        original_emit = pipeline.file_handler.emit
+
+        def slow_emit(record):
+            release.wait()
+            original_emit(record)
+
+        pipeline.file_handler.emit = slow_emit
+        logger = pipeline.get_logger('pipeline-test-drop')
+        for index in range(50):
+            logger.info(f"Message {index}")
+        assert pipeline.queue_handler.dropped > 0
+        release.set()
+        pipeline.stop()
+
+        lines = (tmp_path / 'pipeline-test-drop.log').read_text().splitlines()
+        assert len(lines) == 50 - pipeline.queue_handler.dropped
+
+    def test_logger_has_single_queue_handler(self, tmp_path):
+        pipeline = RequestLogPipeline(directory=tmp_path)
+        pipeline.get_logger('pipeline-test-single')
+        logger = pipeline.get_logger('pipeline-test-single')
+        pipeline.stop()
+        assert [type(handler) for handler in logger.handlers].count(type(pipeline.queue_handler)) == 1
+        assert not any(isinstance(handler, logging.FileHandler) for handler in logger.handlers)
@@ -0,0 +1,61 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from common import renderers
+from common.renderers import FastJSONRenderer, RawJSON, encode_json
+from common.utils import generate_response
+
+PAYLOAD = {
+    'success': True,
+    'message': gettext_lazy('success'),
+    'data': [
+        {
+            'id': 1,
+            'name': 'Player – 1  ',
+            'value': Decimal('1050000.25'),
+            'created_at': datetime(2024, 9, 1, 10, 30, 15, 123456, tzinfo=timezone.utc),
+            'errors': {0: ['Invalid']},
+        }
+    ],
+}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(renderers, 'orjson', None)
+    return request.param
+
+
+class TestFastJSONRenderer:
+    def test_output_matches_drf_renderer(self, encoder):
+        expected = JSONRenderer().render(PAYLOAD)
+        assert json.loads(FastJSONRenderer().render(PAYLOAD)) == json.loads(expected)
+        assert b'\\u2028' in FastJSONRenderer().render(PAYLOAD)
+
+    def test_raw_json_is_spliced_into_envelope(self, encoder):
+        data = RawJSON(encode_json(PAYLOAD['data']))
+        response = generate_response(data=data, pagination={'next': None, 'previous': None})
+        content = FastJSONRenderer().render(response.data)
+        assert data.content in content
+        assert json.loads(content) == {
+            'success': True, 'message': 'success', 'status': 200, 'custom_code': 0,
+            'data': json.loads(JSONRenderer().render(PAYLOAD['data'])), 'next': None, 'previous': None,
+        }
+
+    def test_indented_output_expands_raw_json(self, encoder):
+        content = FastJSONRenderer().render(
+            {'data': RawJSON(b'[1,2]')}, accepted_media_type='application/json; indent=4'
+        )
+        assert content.startswith(b'{\n    "data"')
+        assert json.loads(content) == {'data': [1, 2]}
+
+    def test_none_renders_empty_body(self):
+        assert FastJSONRenderer().render(None) == b''
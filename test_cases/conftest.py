@@ -0,0 +1,22 @@
+import pytest
+from django.core.cache import caches
+
+from common import instrumentation
+from common.instrumentation import MetricsStore
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Cached responses and version counters would otherwise outlive each test's database rollback
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, settings, monkeypatch):
+    # Request metrics of the tests go to a temporary store instead of logs/metrics, and no flush is left for exit
+    directory = tmp_path / 'metrics'
+    settings.REQUEST_INSTRUMENTATION = {**settings.REQUEST_INSTRUMENTATION, 'DIR': directory}
+    monkeypatch.setattr(instrumentation, '_store', MetricsStore(directory))
+    return directory
@@ -0,0 +1,103 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from league.models import Player
+
+from test_cases.common.test_instrumentation import server_timing
+from test_cases.fixtures import api_client, create_user, create_team, create_player
+
+
+def async_get(path, data=None, headers=None):
+    # Goes through the ASGI handler, so the views run on the event loop
+    return async_to_sync(AsyncClient().get)(path, data, headers=headers)
+
+
+@pytest.fixture
+def league(create_user, create_team, create_player):
+    user = create_user()
+    team = create_team(user)
+    seller = create_team(create_user('user2@gmail.com'), name='Seller Team')
+    for index, position in enumerate(['GK', 'DEF', 'MID']):
+        create_player(f'Player - {index}', team, position)
+        player = create_player(f'Seller Player - {index}', seller, position)
+        player.for_sale = True
+        player.sale_price = 50000 * (index + 1)
+        player.save()
+    return user, team
+
+
+class TestAsyncViews:
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('async_name, sync_name, params', [
+        ('async-team-list', 'team-list', {}),
+        ('async-player-list', 'player-list', {'page_size': 2}),
+        ('async-players-for-sale', 'players-for-sale', {'sort': 'price', 'position': 'GK,MID'}),
+        ('async-transactions-history', 'transactions-history/', {}),
+        ('async-player-list', 'player-list', {'fields': 'id,name,team.name'}),
+    ])
+    def test_lists_match_sync_endpoints(self, api_client, league, async_name, sync_name, params):
+        response = async_get(reverse(async_name), params)
+        expected = api_client.get(reverse(sync_name), params).json()
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body['data'] == expected['data']
+        assert (body['next'] is None) == (expected['next'] is None)
+
+    @pytest.mark.django_db
+    def test_detail_and_not_found(self, api_client, league):
+        user, team = league
+        url = reverse('async-team-detail', kwargs={'pk': team.id})
+        assert async_get(url).json() == api_client.get(reverse('team-detail', kwargs={'pk': team.id})).json()
+
+        response = async_get(reverse('async-player-detail', kwargs={'pk': 101}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()['message'] == 'Player not found'
+
+    @pytest.mark.django_db
+    def test_cursor_pages_and_invalid_input(self, league):
+        first = async_get(reverse('async-player-list'), {'page_size': 4}).json()
+        second = async_get(first['next']).json()
+        assert len(first['data']) == 4 and len(second['data']) == 2 and second['next'] is None
+
+        assert async_get(reverse('async-player-list'), {'cursor': 'nope'}).status_code == status.HTTP_404_NOT_FOUND
+        response = async_get(reverse('async-players-for-sale'), {'position': 'XX'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'position' in response.json()['errors']
+
+    @pytest.mark.django_db
+    def test_exclude_my_team_authenticates_the_user(self, create_user, create_team, create_player):
+        user = create_user()
+        create_player('Player - 1', create_team(user), 'GK')
+        Player.objects.update(for_sale=True, sale_price=1000)
+        url = reverse('async-players-for-sale')
+        token = RefreshToken.for_user(user).access_token
+        assert len(async_get(url, {'exclude_my_team': 'true'}).json()['data']) == 1
+        response = async_get(url, {'exclude_my_team': 'true'}, headers={'Authorization': f'Bearer {token}'})
+        assert response.json()['data'] == []
+        assert 'Authorization' in response['Vary']
+
+        response = async_get(url, headers={'Authorization': 'Bearer invalid'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.django_db
+    def test_cache_etag_and_instrumentation(self, league):
+        url = reverse('async-team-list')
+        first = async_get(url)
+        assert server_timing(first)['queries'] == 1
+        cached = async_get(url)
+        assert server_timing(cached)['queries'] == 0
+        assert cached.content == first.content
+
+        response = async_get(url, headers={'If-None-Match': first['ETag']})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        missing = reverse('async-team-detail', kwargs={'pk': league[1].id + 100})
+        assert async_get(missing, headers={'If-None-Match': '*'}).status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.django_db
+    def test_writes_are_rejected(self, league):
+        response = async_to_sync(AsyncClient().post)(reverse('async-team-list'), {})
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
@@ -0,0 +1,168 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from common.cache import get_cache
+from common.idempotency import idempotent, idempotency_cache_key, get_idempotency_cache, release_lock
+from common.utils import generate_response
+from league.models import Team, Player, Transaction
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+class TestIdempotencyKey:
+    @pytest.mark.django_db
+    def test_replayed_buy_returns_original_response(self, auth_client, create_user, create_team, create_player):
+        client, buyer = auth_client
+        create_team(buyer)
+        player = create_player('Player - 1', create_team(create_user('user2@gmail.com')), 'GK')
+        Player.objects.filter(id=player.id).update(for_sale=True, sale_price=50000)
+        url = reverse('buy-player', kwargs={'pk': player.id})
+
+        first = client.post(url, {'price': 50000}, format='json', HTTP_IDEMPOTENCY_KEY='buy-1')
+        with CaptureQueriesContext(connection) as queries:
+            second = client.post(url, {'price': 50000}, format='json', HTTP_IDEMPOTENCY_KEY='buy-1')
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert second.json() == first.json()
+        assert second['Idempotent-Replayed'] == 'true'
+        assert Transaction.objects.count() == 1
+        assert not any('league_' in query['sql'] for query in queries.captured_queries)
+
+    @pytest.mark.django_db
+    def test_replayed_team_create(self, auth_client):
+        client, user = auth_client
+        url = reverse('team-list')
+        data = {'name': 'Team', 'slogan': 'Slogan'}
+        first = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='team-1')
+        second = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='team-1')
+        assert first.status_code == second.status_code == status.HTTP_201_CREATED
+        assert second.json()['data']['id'] == first.data['data']['id']
+        assert Team.objects.count() == 1
+
+    @pytest.mark.django_db
+    def test_records_outlive_a_full_response_cache(self, auth_client):
+        client, user = auth_client
+        url = reverse('team-list')
+        data = {'name': 'Team', 'slogan': 'Slogan'}
+        first = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='team-1')
+        for index in range(1000):
+            get_cache().set(f'league:response:{index}', b'{}')
+        second = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='team-1')
+        assert second['Idempotent-Replayed'] == 'true'
+        assert second.json()['data']['id'] == first.data['data']['id']
+        assert Team.objects.count() == 1
+
+    @pytest.mark.django_db
+    def test_key_reused_with_different_body(self, auth_client, create_team):
+        client, user = auth_client
+        create_team(user)
+        url = reverse('player-list')
+        client.post(url, {'name': 'Player - 1', 'position': 'GK'}, format='json', HTTP_IDEMPOTENCY_KEY='player-1')
+        response = client.post(
+            url, {'name': 'Player - 2', 'position': 'GK'}, format='json', HTTP_IDEMPOTENCY_KEY='player-1'
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Player.objects.count() == 1
+
+    @pytest.mark.django_db
+    def test_keys_are_scoped_per_user(self, api_client, create_user):
+        url = reverse('team-list')
+        for email in ['user1@gmail.com', 'user2@gmail.com']:
+            api_client.force_authenticate(create_user(email))
+            response = api_client.post(
+                url, {'name': 'Team', 'slogan': 'Slogan'}, format='json', HTTP_IDEMPOTENCY_KEY='team-1'
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+        assert Team.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_requests_without_key_are_not_stored(self, auth_client, create_team):
+        client, user = auth_client
+        create_team(user)
+        url = reverse('player-list')
+        for _ in range(2):
+            response = client.post(url, {'name': 'Player - 1', 'position': 'GK'}, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+        assert Player.objects.count() == 2
+
+
+class TestConcurrentDuplicates:
+    def test_concurrent_duplicates_execute_once(self):
+        calls = []
+
+        class SlowView(APIView):
+            permission_classes = [AllowAny]
+
+            @idempotent
+            def post(self, request, *args, **kwargs):
+                calls.append(request.data)
+                time.sleep(0.2)
+                return generate_response(status=status.HTTP_201_CREATED, data={'call': len(calls)})
+
+        factory = APIRequestFactory()
+        view = SlowView.as_view()
+        user = SimpleNamespace(pk=1, is_authenticated=True)
+        start = threading.Barrier(4)
+        responses = []
+
+        def send():
+            request = factory.post('/slow/', {'name': 'Team'}, format='json', HTTP_IDEMPOTENCY_KEY='same')
+            force_authenticate(request, user=user)
+            start.wait()
+            responses.append(view(request))
+
+        threads = [threading.Thread(target=send) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 4
+        assert sum(response.has_header('Idempotent-Replayed') for response in responses) == 3
+
+    def test_lock_expiring_mid_request_is_left_to_the_retry(self, settings, caplog):
+        settings.IDEMPOTENCY = {**settings.IDEMPOTENCY, 'LOCK_TIMEOUT': 0.1}
+        lock_keys = []
+
+        class SlowView(APIView):
+            permission_classes = [AllowAny]
+
+            @idempotent
+            def post(self, request, *args, **kwargs):
+                lock_keys.append(f'{idempotency_cache_key(request, "late")}:lock')
+                time.sleep(0.2)
+                # The lock has expired, so a retry arriving now takes it
+                assert get_idempotency_cache().add(lock_keys[0], 'retry')
+                return generate_response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        request = APIRequestFactory().post('/late/', {}, format='json', HTTP_IDEMPOTENCY_KEY='late')
+        force_authenticate(request, user=SimpleNamespace(pk=1, is_authenticated=True))
+        SlowView.as_view()(request)
+        assert get_idempotency_cache().get(lock_keys[0]) == 'retry'
+        assert 'outlasted' in caplog.text
+
+    def test_redis_locks_are_released_in_one_step(self):
+        calls = []
+
+        class FakeRedis:
+            def get_client(self, write=False):
+                return self
+
+            def eval(self, script, numkeys, *args):
+                calls.append((numkeys, *args))
+
+        cache = RedisCache('redis://127.0.0.1:6379/0', {'KEY_PREFIX': 'test'})
+        cache.__dict__['_cache'] = FakeRedis()
+        release_lock(cache, 'league:idempotency:abc:lock', 42)
+        assert calls == [(1, 'test:1:league:idempotency:abc:lock', 42)]
@@ -0,0 +1,133 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from rest_framework import status
+
+from league import events
+from league.events import MarketEventBroker
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = MarketEventBroker(history_size=5, queue_size=3)
+    monkeypatch.setattr(events, '_broker', broker)
+    return broker
+
+
+def frames(chunk):
+    """Parse SSE frames into (id, event, data) tuples, skipping comments and the retry field."""
+    parsed = []
+    for frame in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if line and not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields.get('id'), fields['event'], fields['data']))
+    return parsed
+
+
+class TestMarketEventBroker:
+    def test_resume_from_last_event_id(self, broker):
+        published = [broker.publish('listed', {'player_id': index}) for index in range(4)]
+        resumed = broker.subscribe(published[1].id)
+        assert [event.id for event in resumed.get(0)] == [event.id for event in published[2:]]
+        assert broker.subscribe(published[-1].id).get(0) == []
+
+        # Older than the history, from another process or malformed
+        for last_event_id in [f'{broker.epoch}-0', 'other-1', 'nonsense']:
+            broker.publish('listed', {})
+            broker.publish('listed', {})
+            assert [event.type for event in broker.subscribe(last_event_id).get(0)] == ['reset']
+
+    def test_slow_subscriber_is_cut_at_a_resumable_point(self, broker):
+        slow, fast = broker.subscribe(), broker.subscribe()
+        published = [broker.publish('sold', {'player_id': index}) for index in range(5)]
+        assert len(fast.get(0)) == 3 and fast.overflowed
+
+        delivered = slow.get(0)
+        assert [event.id for event in delivered] == [event.id for event in published[:3]]
+        assert slow.overflowed and slow.get(0) == []
+        resumed = broker.subscribe(delivered[-1].id)
+        assert [event.id for event in resumed.get(0)] == [event.id for event in published[3:]]
+
+    def test_async_consumer_is_woken_by_publish(self, broker):
+        subscription = broker.subscribe()
+
+        async def consume():
+            assert await subscription.aget(0.01) == []
+            broker.publish('listed', {'player_id': 1})
+            return await subscription.aget(1)
+
+        assert [event.type for event in async_to_sync(consume)()] == ['listed']
+
+    def test_unsubscribed_streams_get_nothing(self, broker):
+        stream = events.event_stream(None, keepalive=0)
+        assert next(stream) == b'retry: 3000\n\n'
+        subscription, = broker.subscriptions
+        assert next(stream) == b': keepalive\n\n'
+        stream.close()
+        assert subscription not in broker.subscriptions
+        broker.publish('listed', {})
+        assert subscription.take() == []
+
+
+class TestMarketEventsAPI:
+    @pytest.mark.django_db
+    def test_market_writes_are_streamed_after_commit(self, broker, auth_client, create_user, create_team,
+                                                     create_player, django_capture_on_commit_callbacks):
+        client, user = auth_client
+        seller = create_user('user2@gmail.com')
+        seller_team = create_team(seller, name='Seller Team')
+        create_team(user)
+        player = create_player('Player - 1', seller_team, 'GK')
+        other = create_player('Player - 2', seller_team, 'DEF')
+
+        response = client.get(reverse('market-events'), HTTP_ACCEPT='text/event-stream')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = iter(response.streaming_content)
+        next(stream)
+
+        client.force_authenticate(seller)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('set-player-for-sale', kwargs={'pk': player.id}), {'price': 1000}, format='json')
+            client.post(reverse('set-player-for-sale', kwargs={'pk': other.id}), {'price': 2000}, format='json')
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('remove-player-from-sale', kwargs={'pk': other.id}))
+        received = frames(next(stream))
+        client.force_authenticate(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('buy-player', kwargs={'pk': player.id}), {'price': 1000}, format='json')
+        received += frames(next(stream))
+
+        assert [event for _, event, _ in received] == ['listed', 'listed', 'delisted', 'sold']
+        assert '"price":"1000.00"' in received[0][2] and f'"player_id":{player.id}' in received[3][2]
+        response.close()
+        assert not broker.subscriptions
+
+        # A reconnecting client gets what it missed
+        resumed = client.get(reverse('market-events'), HTTP_LAST_EVENT_ID=received[1][0])
+        stream = iter(resumed.streaming_content)
+        next(stream)
+        assert [event for _, event, _ in frames(next(stream))] == ['delisted', 'sold']
+        resumed.close()
+
+    @pytest.mark.django_db
+    def test_unread_streams_do_not_subscribe(self, broker, api_client):
+        response = api_client.head(reverse('market-events'))
+        assert response.status_code == status.HTTP_200_OK
+        response.close()
+        api_client.get(reverse('market-events')).close()
+        assert len(broker.subscriptions) == 0
+
+    @pytest.mark.django_db
+    def test_failed_writes_publish_nothing(self, broker, auth_client, create_user, create_team, create_player,
+                                           django_capture_on_commit_callbacks):
+        client, user = auth_client
+        create_team(user)
+        player = create_player('Player - 1', create_team(create_user('user2@gmail.com'), name='Seller Team'))
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('buy-player', kwargs={'pk': player.id}), {'price': 1000}, format='json')
+            client.post(reverse('remove-player-from-sale', kwargs={'pk': player.id}))
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert not broker.history
@@ -86,6 +86,59 @@ class TestCreatePlayer:
         assert response.data['message'] == "You have already 20 players in your team. Can't add more player."
 
 
+class TestBulkCreatePlayer:
+    @pytest.mark.django_db
+    def test_bulk_create_players_success(self, auth_client, create_team, django_assert_max_num_queries):
+        client, user = auth_client
+        team = create_team(user)
+        url = reverse('player-bulk-create')
+        data = [{'name': f'Player - {i}', 'position': position} for i, position in enumerate(['GK', 'DEF', 'MID'])]
+        with django_assert_max_num_queries(9):
+            response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [player['name'] for player in response.data['data']] == ['Player - 0', 'Player - 1', 'Player - 2']
+        assert all(player['team']['id'] == team.id for player in response.data['data'])
+        team.refresh_from_db()
+        assert team.players.count() == 3
+        assert team.total_value == sum(player.value for player in team.players.all())
+
+    @pytest.mark.django_db
+    def test_bulk_create_players_over_squad_limit(self, auth_client, create_team, create_player):
+        client, user = auth_client
+        team = create_team(user)
+        for i in range(1, 19):
+            create_player(f'Player - {i}', team)
+        url = reverse('player-bulk-create')
+        data = [{'name': f'Player - {i}', 'position': 'DEF'} for i in range(19, 22)]
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert team.players.count() == 18
+
+    @pytest.mark.django_db
+    def test_bulk_create_players_with_invalid_request_data(self, auth_client, create_team):
+        client, user = auth_client
+        team = create_team(user)
+        url = reverse('player-bulk-create')
+
+        # One invalid position rejects the whole batch
+        data = [{'name': 'Player - 1', 'position': 'GK'}, {'name': 'Player - 2', 'position': 'GKJ'}]
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Empty list and non-list body
+        assert client.post(url, [], format='json').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.post(url, {'name': 'Player - 1'}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+        assert team.players.count() == 0
+
+    @pytest.mark.django_db
+    def test_user_cannot_bulk_create_players_without_team(self, auth_client):
+        client, user = auth_client
+        url = reverse('player-bulk-create')
+        response = client.post(url, [{'name': 'Player - 1', 'position': 'GK'}], format='json')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.data['message'] == "You don't have team. Create team first."
+
+
 class TestRetrievePlayer:
     @pytest.mark.django_db
     def test_player_retrieve_success(self, api_client, create_user, create_team, create_player):
@@ -126,6 +179,48 @@ class TestListPlayer:
         assert len(response.data['data']) == 0
         assert response.data['message'] == "success"
 
+    @pytest.mark.django_db
+    def test_player_list_query_count_is_constant(self, api_client, create_user, create_team, create_player,
+                                                 django_assert_num_queries):
+        for index in range(3):
+            team = create_team(create_user(f'user{index}@gmail.com'), name=f'Team {index}')
+            for player_index in range(10):
+                create_player(f'Player - {index}.{player_index}', team, 'MID')
+
+        url = reverse('player-list')
+        # Players are joined with their team and owner, and the squad value is a stored column
+        with django_assert_num_queries(1):
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['data']) == 30
+        assert all(player['team']['total_value'] == 10000000 for player in response.data['data'])
+
+    @pytest.mark.django_db
+    def test_player_list_cursor_pagination(self, api_client, create_user, create_team, create_player):
+        team = create_team(create_user())
+        players = [create_player(f'Player - {index}', team, 'GK') for index in range(5)]
+
+        response = api_client.get(reverse('player-list'), {'page_size': 2})
+        assert [player['id'] for player in response.data['data']] == [players[4].id, players[3].id]
+        assert response.data['previous'] is None
+
+        second_page = api_client.get(response.data['next'])
+        assert [player['id'] for player in second_page.data['data']] == [players[2].id, players[1].id]
+
+        last_page = api_client.get(second_page.data['next'])
+        assert [player['id'] for player in last_page.data['data']] == [players[0].id]
+        assert last_page.data['next'] is None
+
+        previous_page = api_client.get(last_page.data['previous'])
+        assert [player['id'] for player in previous_page.data['data']] == [players[2].id, players[1].id]
+        assert previous_page.data['success'] is True
+
+    @pytest.mark.django_db
+    def test_player_list_with_invalid_cursor(self, api_client):
+        response = api_client.get(reverse('player-list'), {'cursor': 'not-a-cursor'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data['message'] == 'Invalid cursor'
+
 
 class TestUpdatePlayer:
     @pytest.mark.django_db
@@ -1,9 +1,18 @@
 import random
+import threading
+import time
 
 import pytest
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.db.models import Sum, Count
 from django.urls import reverse
 from rest_framework import status
 
+from account.models import User
+from league.models import Team, Player, Transaction
+from league.services import buy_player, TransferError
+
 from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
 
 
@@ -129,6 +138,77 @@ class TestPlayerListedForSale:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['data']) == 2
 
+    @pytest.mark.django_db
+    def test_players_listed_for_sale_query_count(self, api_client, create_user, create_team, create_player,
+                                                 django_assert_num_queries):
+        for index in range(4):
+            team = create_team(create_user(f'user{index}@gmail.com'), name=f'Team {index}')
+            for player_index in range(5):
+                player = create_player(f'Player - {index}.{player_index}', team, 'DEF')
+                player.for_sale = True
+                player.sale_price = 500000
+                player.save()
+
+        url = reverse('players-for-sale')
+        with django_assert_num_queries(1):
+            response = api_client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['data']) == 20
+        assert response.data['data'][0]['team']['owner']['email'].startswith('user')
+
+    @pytest.fixture
+    def listed(self, create_user, create_team, create_player):
+        # (name, position, sale_price, value), listed by a team other than the requesting user's
+        team = create_team(create_user('seller@gmail.com'), name='Seller')
+        players = {}
+        for name, position, price, value in [
+            ('Keeper', 'GK', 400000, 900000), ('Back', 'DEF', 700000, 1200000),
+            ('Winger', 'MID', 550000, 1000000), ('Striker', 'ATT', 900000, 1500000),
+        ]:
+            player = create_player(name, team, position)
+            Player.objects.filter(id=player.id).update(for_sale=True, sale_price=price, value=value)
+            players[name] = player
+        return players
+
+    @pytest.mark.django_db
+    def test_market_filters(self, api_client, listed):
+        url = reverse('players-for-sale')
+
+        def names(params):
+            response = api_client.get(url, params)
+            assert response.status_code == status.HTTP_200_OK
+            return [player['name'] for player in response.json()['data']]
+
+        assert names({'position': 'DEF,mid', 'sort': 'price'}) == ['Winger', 'Back']
+        assert names({'min_price': 500000, 'max_price': 800000, 'sort': '-price'}) == ['Back', 'Winger']
+        assert names({'min_value': 1000000, 'sort': 'value'}) == ['Winger', 'Back', 'Striker']
+        assert names({'max_value': 1000000, 'sort': '-value'}) == ['Winger', 'Keeper']
+
+    @pytest.mark.django_db
+    def test_market_sorted_pages(self, api_client, listed):
+        url = reverse('players-for-sale')
+        first = api_client.get(url, {'sort': 'price', 'page_size': 3}).json()
+        assert [player['name'] for player in first['data']] == ['Keeper', 'Winger', 'Back']
+        second = api_client.get(first['next']).json()
+        assert [player['name'] for player in second['data']] == ['Striker']
+
+    @pytest.mark.django_db
+    def test_market_excludes_my_team(self, auth_client, create_team, create_player, listed):
+        client, user = auth_client
+        own = create_player('Own', create_team(user), 'GK')
+        Player.objects.filter(id=own.id).update(for_sale=True, sale_price=100000)
+        url = reverse('players-for-sale')
+        assert len(client.get(url).json()['data']) == 5
+        response = client.get(url, {'exclude_my_team': 'true'})
+        assert 'Own' not in [player['name'] for player in response.json()['data']]
+        assert 'Authorization' in response['Vary']
+
+    @pytest.mark.django_db
+    def test_market_with_invalid_filters(self, api_client):
+        url = reverse('players-for-sale')
+        for params in [{'position': 'GKJ'}, {'sort': 'name'}, {'min_price': 10, 'max_price': 5}, {'max_value': 'x'}]:
+            assert api_client.get(url, params).status_code == status.HTTP_400_BAD_REQUEST
+
 
 class TestPlayerBuy:
     @pytest.mark.django_db
@@ -148,6 +228,10 @@ class TestPlayerBuy:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['message'] == 'Player bought successfully.'
         assert player.team == buyer_team
+        buyer_team.refresh_from_db()
+        seller_team.refresh_from_db()
+        assert buyer_team.total_value == player.value
+        assert seller_team.total_value == 0
 
     @pytest.mark.django_db
     def test_buy_player_with_invalid_request_body(self, auth_client, create_user, create_team, create_player):
@@ -237,3 +321,157 @@ class TestPlayerBuy:
         assert response.data['custom_code'] == 1504
 
 
+class TestBatchPlayerBuy:
+    @pytest.fixture
+    def market(self, create_user, create_team, create_player):
+        # Two sellers with two listed players each
+        players = []
+        for index in range(2):
+            seller_team = create_team(create_user(f'seller{index}@gmail.com'), name=f'Seller {index}')
+            for number in range(2):
+                player = create_player(f'Player - {index}{number}', seller_team, 'MID')
+                Player.objects.filter(id=player.id).update(for_sale=True, sale_price=1000000)
+                players.append(player)
+        return players
+
+    @pytest.mark.django_db
+    def test_buy_players(self, auth_client, create_team, market):
+        client, buyer = auth_client
+        buyer_team = create_team(buyer)
+        url = reverse('buy-players')
+        data = {'players': [{'player_id': player.id, 'price': 1000000} for player in market[:3]]}
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data'] == {'bought': [player.id for player in market[:3]], 'failed': []}
+        buyer_team.refresh_from_db()
+        assert buyer_team.capital == 2000000
+        assert set(buyer_team.players.values_list('id', flat=True)) == {player.id for player in market[:3]}
+        assert not Player.objects.filter(id__in=[player.id for player in market[:3]], for_sale=True).exists()
+        assert Transaction.objects.filter(buyer_team=buyer_team).count() == 3
+        assert list(Team.objects.exclude(id=buyer_team.id).order_by('id').values_list('capital', flat=True)) == [
+            7000000, 6000000
+        ]
+        call_command('recompute_team_values', '--check')
+
+    @pytest.mark.django_db
+    def test_buy_players_all_or_nothing_rejects_whole_batch(self, auth_client, create_team, market):
+        client, buyer = auth_client
+        buyer_team = create_team(buyer)
+        url = reverse('buy-players')
+        data = {'players': [
+            {'player_id': market[0].id, 'price': 1000000},
+            {'player_id': market[1].id, 'price': 1000},
+            {'player_id': 101, 'price': 1000000},
+        ]}
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert [(error['player_id'], error['custom_code']) for error in response.data['errors']] == [
+            (market[1].id, 1502), (101, 1505)
+        ]
+        assert not Transaction.objects.exists()
+        assert buyer_team.players.count() == 0
+
+    @pytest.mark.django_db
+    def test_buy_players_with_insufficient_combined_capital(self, auth_client, create_team, market):
+        client, buyer = auth_client
+        create_team(buyer)
+        Player.objects.update(sale_price=2000000)
+        url = reverse('buy-players')
+        data = {'players': [{'player_id': player.id, 'price': 2000000} for player in market[:3]]}
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.data['errors'][0]['custom_code'] == 1504
+        assert not Transaction.objects.exists()
+
+    @pytest.mark.django_db
+    def test_buy_players_best_effort(self, auth_client, create_team, create_player, market):
+        client, buyer = auth_client
+        buyer_team = create_team(buyer)
+        for index in range(18):
+            create_player(f'Own - {index}', buyer_team)
+        url = reverse('buy-players')
+        data = {
+            'players': [
+                {'player_id': market[0].id, 'price': 1000},
+                {'player_id': market[1].id, 'price': 1000000},
+                {'player_id': market[2].id, 'price': 1000000},
+                {'player_id': market[3].id, 'price': 1000000},
+            ],
+            'all_or_nothing': False,
+        }
+        response = client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['bought'] == [market[1].id, market[2].id]
+        assert [(error['player_id'], error['custom_code']) for error in response.data['data']['failed']] == [
+            (market[0].id, 1502), (market[3].id, 1506)
+        ]
+        assert buyer_team.players.count() == 20
+        call_command('recompute_team_values', '--check')
+
+    @pytest.mark.django_db
+    def test_buy_players_with_invalid_request_body(self, auth_client, create_team, market):
+        client, buyer = auth_client
+        create_team(buyer)
+        url = reverse('buy-players')
+        assert client.post(url, {'players': []}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+        data = {'players': [{'player_id': market[0].id, 'price': 1000000}] * 2}
+        assert client.post(url, data, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestConcurrentPlayerBuy:
+    @pytest.mark.django_db(transaction=True)
+    def test_concurrent_buys_never_double_sell(self, create_team, create_player):
+        seller_team = create_team(User.objects.create(email='seller@gmail.com', first_name='Seller'))
+        players = []
+        for index in range(3):
+            player = create_player(f'Player - {index}', seller_team, 'MID')
+            Player.objects.filter(id=player.id).update(for_sale=True, sale_price=400000)
+            players.append(player)
+        buyer_teams = [
+            create_team(User.objects.create(email=f'buyer{index}@gmail.com', first_name='Buyer'), name=f'Buyer {index}')
+            for index in range(6)
+        ]
+        initial_capital = Team.objects.aggregate(total=Sum('capital'))['total']
+        start = threading.Barrier(len(buyer_teams))
+        # (team id, player id) of every completed buy, and whatever else ended a buy attempt
+        bought, failures = [], []
+
+        def buy_all(team):
+            try:
+                start.wait()
+                for player in players:
+                    # SQLite reports lock contention as OperationalError, retry like a client would
+                    for attempt in range(50):
+                        try:
+                            buy_player(team.id, player.id, 400000)
+                            bought.append((team.id, player.id))
+                        except OperationalError as err:
+                            if attempt == 49:
+                                failures.append(err)
+                            time.sleep(0.01)
+                            continue
+                        except TransferError as err:
+                            # Only losing the race to another buyer is expected
+                            if err.custom_code != 1501:
+                                failures.append(err)
+                        break
+            except Exception as err:
+                failures.append(err)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy_all, args=(team,)) for team in buyer_teams]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert failures == []
+        assert sorted(player_id for _, player_id in bought) == [player.id for player in players]
+        sales = Transaction.objects.values('player').annotate(count=Count('id'))
+        assert {sale['player']: sale['count'] for sale in sales} == {player.id: 1 for player in players}
+        assert Team.objects.aggregate(total=Sum('capital'))['total'] == initial_capital
+        buyers = {player_id: team_id for team_id, player_id in bought}
+        for player in Player.objects.all():
+            assert player.team_id == buyers[player.id]
+        call_command('recompute_team_values', '--check')
@@ -0,0 +1,137 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+class TestResponseCache:
+    @pytest.mark.django_db
+    def test_repeated_team_list_is_served_from_cache(self, api_client, create_user, create_team,
+                                                     django_assert_num_queries):
+        create_team(create_user())
+        url = reverse('team-list')
+        first = api_client.get(url)
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+        assert second.status_code == status.HTTP_200_OK
+        assert second.json() == first.json()
+
+    @pytest.mark.django_db
+    def test_query_params_are_part_of_the_key(self, api_client, create_user, create_team, create_player):
+        team = create_team(create_user())
+        for index in range(3):
+            create_player(f'Player - {index}', team, 'GK')
+        url = reverse('player-list')
+        assert len(api_client.get(url).data['data']) == 3
+        assert len(api_client.get(url, {'page_size': 1}).data['data']) == 1
+
+    @pytest.mark.django_db
+    def test_missing_resource_is_not_cached(self, api_client, create_user, create_team, create_player):
+        url = reverse('player-detail', kwargs={'pk': 101})
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.django_db
+    def test_set_for_sale_invalidates_market(self, auth_client, create_team, create_player,
+                                             django_capture_on_commit_callbacks):
+        client, user = auth_client
+        player = create_player('Player - 1', create_team(user), 'GK')
+        url = reverse('players-for-sale')
+        assert len(client.get(url).data['data']) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('set-player-for-sale', kwargs={'pk': player.id}), {'price': 500000}, format='json')
+        assert len(client.get(url).data['data']) == 1
+
+    @pytest.mark.django_db
+    def test_buy_invalidates_market_teams_and_history(self, auth_client, create_user, create_team, create_player,
+                                                      django_capture_on_commit_callbacks):
+        client, buyer = auth_client
+        buyer_team = create_team(buyer)
+        seller_team = create_team(create_user('user2@gmail.com'), name='Seller Team')
+        player = create_player('Player - 1', seller_team, 'GK')
+        player.for_sale = True
+        player.sale_price = 50000
+        player.save()
+        market = client.get(reverse('players-for-sale'))
+        history = client.get(reverse('transactions-history/'))
+        team = client.get(reverse('team-detail', kwargs={'pk': buyer_team.id}))
+        assert len(market.data['data']) == 1 and len(history.data['data']) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse('buy-player', kwargs={'pk': player.id}), {'price': 50000}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        assert len(client.get(reverse('players-for-sale')).data['data']) == 0
+        assert len(client.get(reverse('transactions-history/')).data['data']) == 1
+        updated_team = client.get(reverse('team-detail', kwargs={'pk': buyer_team.id}))
+        assert updated_team.data['data']['capital'] != team.data['data']['capital']
+
+    @pytest.mark.django_db
+    def test_profile_update_invalidates_team_owner(self, auth_client, create_team,
+                                                   django_capture_on_commit_callbacks):
+        client, user = auth_client
+        team = create_team(user)
+        url = reverse('team-detail', kwargs={'pk': team.id})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('user-profile-update'), {'first_name': 'New fn', 'last_name': 'New ln'}, format='json')
+        assert client.get(url).data['data']['owner']['first_name'] == 'New fn'
+
+
+class TestConditionalGet:
+    @pytest.mark.django_db
+    def test_market_not_modified(self, api_client, create_user, create_team, create_player,
+                                 django_assert_num_queries):
+        create_player('Player - 1', create_team(create_user()), 'GK')
+        url = reverse('players-for-sale')
+        response = api_client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"')
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+    @pytest.mark.django_db
+    def test_wildcard_only_matches_existing_resources(self, api_client, create_user, create_team):
+        team = create_team(create_user())
+        response = api_client.get(reverse('team-detail', kwargs={'pk': team.id}), HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        response = api_client.get(reverse('team-detail', kwargs={'pk': team.id + 1}), HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.django_db
+    def test_market_etag_changes_after_listing(self, auth_client, create_team, create_player,
+                                               django_capture_on_commit_callbacks):
+        client, user = auth_client
+        player = create_player('Player - 1', create_team(user), 'GK')
+        url = reverse('players-for-sale')
+        etag = client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('set-player-for-sale', kwargs={'pk': player.id}), {'price': 500000}, format='json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert len(response.data['data']) == 1
+
+    @pytest.mark.django_db
+    def test_my_team_etag_is_per_user(self, auth_client, api_client, create_user, create_team):
+        client, user = auth_client
+        create_team(user)
+        url = reverse('team-my-team')
+        response = client.get(url)
+        assert 'Authorization' in response['Vary']
+        assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_304_NOT_MODIFIED
+
+        other = create_user('user2@gmail.com')
+        create_team(other, name='Other Team')
+        api_client.force_authenticate(other)
+        other_response = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert other_response.status_code == status.HTTP_200_OK
+        assert other_response.data['data']['name'] == 'Other Team'
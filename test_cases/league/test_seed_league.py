@@ -0,0 +1,42 @@
+import pytest
+from django.core.management import call_command
+
+from account.models import User
+from league.models import Team, Player, Transaction
+
+
+def league_snapshot(prefix):
+    players = Player.objects.filter(team__user__email__startswith=prefix).order_by('id')
+    transactions = Transaction.objects.filter(seller_team__user__email__startswith=prefix).order_by('id')
+    return (
+        list(players.values_list('position', 'value', 'for_sale', 'sale_price')),
+        list(transactions.values_list('transfer_amount', 'created_at__date')),
+    )
+
+
+class TestSeedLeague:
+    @pytest.mark.django_db
+    def test_seeds_consistent_league(self):
+        call_command('seed_league', '--users', '5', '--transactions', '10', '--listed', '0.5', '--chunk-size', '2')
+        call_command('seed_league', '--users', '3', '--players-per-team', '4')
+
+        assert User.objects.filter(email__endswith='@seed.local').count() == 8
+        assert Team.objects.count() == 8 and Player.objects.count() == 5 * 20 + 3 * 4
+        assert Transaction.objects.filter(inactive=True).count() == 10
+        assert Player.objects.filter(for_sale=True, sale_price__isnull=False).exists()
+        squad = Player.objects.filter(team=Team.objects.first())
+        assert {position: squad.filter(position=position).count() for position in ['GK', 'DEF', 'MID', 'ATT']} == {
+            'GK': 2, 'DEF': 7, 'MID': 7, 'ATT': 4,
+        }
+        # The password is hashed once per run
+        assert len(set(User.objects.values_list('password', flat=True))) == 2
+        assert User.objects.first().check_password('Seed@1234')
+        call_command('recompute_team_values', '--check')
+
+    @pytest.mark.django_db
+    def test_same_seed_same_league(self):
+        for prefix in ['first', 'second']:
+            call_command('seed_league', '--users', '4', '--transactions', '6', '--seed', '7', '--chunk-size', '2',
+                         '--email-prefix', prefix)
+        assert league_snapshot('first') == league_snapshot('second')
+        assert len(league_snapshot('first')[1]) == 6
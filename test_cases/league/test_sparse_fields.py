@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from league.models import Player, Transaction
+from league.serializers import PlayerSerializer, TransactionsHistorySerializer
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+def get_with_queries(client, url, params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()['data'], ' '.join(query['sql'] for query in queries.captured_queries)
+
+
+class TestSparseFields:
+    @pytest.mark.django_db
+    def test_fields_prune_player_list(self, api_client, create_user, create_team, create_player):
+        create_player('Player - 1', create_team(create_user()), 'GK')
+        data, sql = get_with_queries(api_client, reverse('player-list'), {'fields': 'id,name'})
+        assert list(data[0]) == ['id', 'name']
+        assert 'league_team' not in sql
+
+    @pytest.mark.django_db
+    def test_nested_fields(self, api_client, create_user, create_team, create_player):
+        create_player('Player - 1', create_team(create_user()), 'GK')
+        data, sql = get_with_queries(api_client, reverse('player-list'), {'fields': 'id,team.name'})
+        assert data[0] == {'id': data[0]['id'], 'team': {'name': 'Test Team'}}
+        assert 'league_team' in sql and 'account_user' not in sql
+
+    @pytest.mark.django_db
+    def test_expand_collapses_other_relations_to_ids(self, api_client, create_user, create_team, create_player):
+        user = create_user()
+        team = create_team(user)
+        create_player('Player - 1', team, 'GK')
+        url = reverse('player-list')
+
+        data, sql = get_with_queries(api_client, url, {'expand': ''})
+        assert data[0]['team'] == team.id
+        assert 'league_team' not in sql
+
+        data, sql = get_with_queries(api_client, url, {'expand': 'team'})
+        assert data[0]['team']['owner'] == user.id
+        assert 'league_team' in sql and 'account_user' not in sql
+
+        data, sql = get_with_queries(api_client, url, {'expand': 'team.owner'})
+        assert data[0]['team']['owner']['email'] == user.email
+
+    @pytest.mark.django_db
+    def test_transactions_history_without_teams(self, api_client, create_user, create_team, create_player):
+        seller_team = create_team(create_user('user1@gmail.com'))
+        buyer_team = create_team(create_user('user2@gmail.com'))
+        player = create_player('Player - 1', seller_team, 'GK')
+        Transaction.objects.create(
+            player=player, seller_team=seller_team, buyer_team=buyer_team, transfer_amount=1000, inactive=True
+        )
+        url = reverse('transactions-history/')
+        data, sql = get_with_queries(api_client, url, {'fields': 'id,player_name,transfer_amount'})
+        assert data[0]['player_name'] == 'Player - 1'
+        assert 'league_team' not in sql
+
+        data, sql = get_with_queries(api_client, url, {'expand': ''})
+        assert (data[0]['seller_team'], data[0]['buyer_team']) == (seller_team.id, buyer_team.id)
+        assert 'league_team' not in sql and 'league_player' in sql
+
+    @pytest.mark.django_db
+    def test_my_transactions_opposite_team(self, auth_client, create_user, create_team, create_player):
+        client, user = auth_client
+        buyer_team = create_team(user)
+        seller_team = create_team(create_user('user2@gmail.com'), name='Seller')
+        player = create_player('Player - 1', seller_team, 'GK')
+        Transaction.objects.create(
+            player=player, seller_team=seller_team, buyer_team=buyer_team, transfer_amount=1000, inactive=True
+        )
+        url = reverse('my_transactions-history')
+        data, _ = get_with_queries(client, url, {'expand': ''})
+        assert data[0]['opposite_team'] == seller_team.id
+
+        data, sql = get_with_queries(client, url, {'fields': 'id,opposite_team.name', 'expand': 'opposite_team'})
+        assert data[0] == {'id': data[0]['id'], 'opposite_team': {'name': 'Seller'}}
+        assert 'league_team' in sql and '"account_user"."first_name"' not in sql
+
+    @pytest.mark.django_db
+    def test_default_output_and_joins_are_unchanged(self, api_client, create_user, create_team, create_player):
+        create_player('Player - 1', create_team(create_user()), 'GK')
+        data = api_client.get(reverse('player-list')).json()['data']
+        assert data[0]['team']['owner']['email'] == 'user@gmail.com'
+        assert set(PlayerSerializer().select_related_paths()) == {'team', 'team__user'}
+        assert set(TransactionsHistorySerializer().select_related_paths()) == {
+            'player', 'seller_team', 'seller_team__user', 'buyer_team', 'buyer_team__user'
+        }
+
+    @pytest.mark.django_db
+    def test_writes_ignore_fields(self, auth_client, create_team):
+        client, user = auth_client
+        create_team(user)
+        response = client.post(
+            reverse('player-list') + '?fields=id', {'name': 'Player - 1', 'position': 'GK'}, format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['data']['name'] == 'Player - 1'
+        assert Player.objects.count() == 1
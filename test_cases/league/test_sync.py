@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from league.models import Tombstone
+from league.sync import encode_watermark
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+@pytest.fixture
+def settled(settings):
+    # Rows are synced as soon as they are written
+    settings.LEAGUE_SYNC = {**settings.LEAGUE_SYNC, 'SETTLE_SECONDS': 0}
+
+
+def sync(client, watermark=None, **params):
+    if watermark:
+        params['since'] = watermark
+    response = client.get(reverse('league-sync'), params)
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    return response.json()['data']
+
+
+def ids(rows):
+    return sorted(row['id'] for row in rows)
+
+
+class TestSync:
+    @pytest.mark.django_db
+    def test_only_changes_after_the_watermark_are_returned(self, settled, auth_client, create_user, create_team,
+                                                           create_player):
+        client, user = auth_client
+        team = create_team(user)
+        players = [create_player(f'Player - {index}', team) for index in range(3)]
+
+        first = sync(client)
+        assert ids(first['teams']) == [team.id] and ids(first['players']) == [player.id for player in players]
+        assert first['players'][0]['team'] == team.id and not first['has_more']
+        assert sync(client, first['watermark'])['players'] == []
+
+        client.post(reverse('set-player-for-sale', kwargs={'pk': players[1].id}), {'price': 1000}, format='json')
+        changes = sync(client, first['watermark'])
+        assert ids(changes['players']) == [players[1].id] and changes['players'][0]['sale_price'] == '1000.00'
+        assert changes['teams'] == [] and changes['transactions'] == []
+
+    @pytest.mark.django_db
+    def test_deletions_are_returned_as_ids(self, settled, auth_client, create_team, create_player):
+        client, user = auth_client
+        team = create_team(user)
+        players = [create_player(f'Player - {index}', team) for index in range(3)]
+        watermark = sync(client)['watermark']
+
+        client.delete(reverse('player-detail', kwargs={'pk': players[0].id}))
+        changes = sync(client, watermark)
+        assert changes['deleted'] == {'teams': [], 'players': [players[0].id], 'transactions': []}
+        # The squad value went down with it
+        assert ids(changes['teams']) == [team.id]
+
+        client.delete(reverse('team-detail', kwargs={'pk': team.id}))
+        changes = sync(client, changes['watermark'])
+        assert changes['deleted']['teams'] == [team.id]
+        assert sorted(changes['deleted']['players']) == [player.id for player in players[1:]]
+        assert changes['teams'] == [] and changes['players'] == []
+
+    @pytest.mark.django_db
+    def test_large_changes_are_paged(self, settled, api_client, create_user, create_team, create_player):
+        team = create_team(create_user())
+        players = [create_player(f'Player - {index}', team) for index in range(5)]
+        received, watermark, has_more = [], None, True
+        while has_more:
+            changes = sync(api_client, watermark, limit=2)
+            assert len(changes['players']) <= 2
+            received += changes['players']
+            watermark, has_more = changes['watermark'], changes['has_more']
+        assert ids(received) == [player.id for player in players]
+
+    @pytest.mark.django_db
+    def test_unsettled_rows_wait_for_the_next_sync(self, settings, api_client, create_user, create_team):
+        settings.LEAGUE_SYNC = {**settings.LEAGUE_SYNC, 'SETTLE_SECONDS': 60}
+        create_team(create_user())
+        assert sync(api_client)['teams'] == []
+
+    @pytest.mark.django_db
+    def test_invalid_and_expired_watermarks(self, settled, api_client):
+        response = api_client.get(reverse('league-sync'), {'since': 'nonsense'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'since' in response.json()['errors']
+
+        expired = encode_watermark({}, timezone.now() - timedelta(days=91))
+        response = api_client.get(reverse('league-sync'), {'since': expired})
+        assert response.status_code == status.HTTP_410_GONE
+
+    @pytest.mark.django_db
+    def test_prune_tombstones(self):
+        old = Tombstone.objects.create(model=Tombstone.PLAYER, object_id=1)
+        Tombstone.objects.filter(id=old.id).update(deleted_at=timezone.now() - timedelta(days=100))
+        recent = Tombstone.objects.create(model=Tombstone.PLAYER, object_id=2)
+        call_command('prune_tombstones')
+        assert list(Tombstone.objects.values_list('id', flat=True)) == [recent.id]
@@ -1,7 +1,10 @@
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.urls import reverse
 from rest_framework import status
 
+from league.models import Team
 from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
 
 
@@ -202,3 +205,34 @@ class TestMyTeam:
         response = client.get(url)
         assert response.status_code == status.HTTP_200_OK
         assert response.data['data']['name'] == team.name
+
+
+class TestTeamValue:
+    @pytest.mark.django_db
+    def test_team_value_follows_player_create_and_delete(self, auth_client, create_team):
+        client, user = auth_client
+        team = create_team(user)
+        url = reverse('player-list')
+        first = client.post(url, {'name': 'Player - 1', 'position': 'GK'}, format='json')
+        client.post(url, {'name': 'Player - 2', 'position': 'DEF'}, format='json')
+        team.refresh_from_db()
+        assert team.total_value == 2000000
+
+        client.delete(reverse('player-detail', kwargs={'pk': first.data['data']['id']}))
+        team.refresh_from_db()
+        assert team.total_value == 1000000
+
+    @pytest.mark.django_db
+    def test_recompute_team_values_command(self, create_user, create_team, create_player):
+        team = create_team(create_user())
+        create_player('Player - 1', team, 'GK')
+        create_player('Player - 2', team, 'ATT')
+        Team.objects.filter(id=team.id).update(total_value=1)
+
+        with pytest.raises(CommandError):
+            call_command('recompute_team_values', '--check')
+
+        call_command('recompute_team_values')
+        team.refresh_from_db()
+        assert team.total_value == 2000000
+        call_command('recompute_team_values', '--check')
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import warnings
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from league.models import Transaction
+
+from test_cases.fixtures import api_client, auth_client, create_user, create_team, create_player
+
+
+@pytest.fixture
+def transactions(create_user, create_team, create_player):
+    seller_team = create_team(create_user('seller@gmail.com'), name='Seller')
+    buyer_team = create_team(create_user('buyer@gmail.com'), name='Buyer, FC')
+    return [
+        Transaction.objects.create(
+            player=create_player(f'Player - {index}', seller_team, 'GK'), seller_team=seller_team,
+            buyer_team=buyer_team, transfer_amount=f'{index + 1}000.50', inactive=True
+        )
+        for index in range(3)
+    ]
+
+
+def read_body(response):
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+class TestTransactionsExport:
+    @pytest.mark.django_db
+    def test_export_csv(self, auth_client, transactions):
+        client, user = auth_client
+        response = client.get(reverse('transactions-export'))
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert 'transactions.csv' in response['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(read_body(response))))
+        assert [int(row['id']) for row in rows] == [transaction.id for transaction in transactions]
+        assert rows[0]['player_name'] == 'Player - 0'
+        assert rows[0]['buyer_team_name'] == 'Buyer, FC'
+        assert rows[2]['transfer_amount'] == '3000.50'
+
+    @pytest.mark.django_db
+    def test_export_ndjson(self, auth_client, transactions):
+        client, user = auth_client
+        response = client.get(
+            reverse('transactions-export'), {'export_format': 'ndjson'}, HTTP_ACCEPT='application/x-ndjson'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in read_body(response).splitlines()]
+        assert len(rows) == 3
+        assert rows[1]['seller_team_id'] == transactions[1].seller_team_id
+        assert rows[1]['transfer_amount'] == '2000.50'
+        assert rows[1]['inactive'] is True
+
+    @pytest.mark.django_db
+    def test_export_since(self, auth_client, transactions):
+        client, user = auth_client
+        since = transactions[1].created_at.isoformat()
+        response = client.get(reverse('transactions-export'), {'export_format': 'ndjson', 'since': since})
+        assert [json.loads(line)['id'] for line in read_body(response).splitlines()] == [
+            transaction.id for transaction in transactions[1:]
+        ]
+
+    @pytest.mark.django_db
+    def test_export_with_invalid_params(self, auth_client):
+        client, user = auth_client
+        url = reverse('transactions-export')
+        assert client.get(url, {'export_format': 'xml'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(url, {'since': 'yesterday'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db
+    def test_anonymous_user_export(self, api_client):
+        assert api_client.get(reverse('transactions-export')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_is_streamed_under_asgi(self, create_user, transactions):
+        token = RefreshToken.for_user(create_user()).access_token
+
+        async def export(export_format):
+            response = await AsyncClient().get(
+                reverse('transactions-export'), {'export_format': export_format},
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            assert response.status_code == status.HTTP_200_OK
+            return b''.join([chunk async for chunk in response]).decode()
+
+        with warnings.catch_warnings():
+            # Raised when a sync body has to be read whole before it is sent
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume synchronous iterators')
+            body = async_to_sync(export)('csv')
+            rows = list(csv.DictReader(io.StringIO(body)))
+            lines = async_to_sync(export)('ndjson').splitlines()
+        assert [int(row['id']) for row in rows] == [transaction.id for transaction in transactions]
+        assert [json.loads(line)['transfer_amount'] for line in lines] == ['1000.50', '2000.50', '3000.50']